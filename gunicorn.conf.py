@@ -0,0 +1,28 @@
+"""
+Gunicorn config for NEXUS HQ
+
+    gunicorn -c gunicorn.conf.py
+
+Equivalent to:
+
+    gunicorn -w $(nproc) -k gthread --threads 8 --preload -b 0.0.0.0:5050 wsgi:app
+
+Threaded workers let phone-home writes and dashboard reads run side by
+side against the WAL-mode database; each worker thread keeps its own warm
+SQLite connection (see get_db in hq_server.py).
+"""
+
+import os
+
+wsgi_app = 'wsgi:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', 5050)}"
+
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 2))
+# Each open dashboard holds one thread on /api/dashboard/stream; at most
+# NEXUS_SSE_MAX_STREAMS (default 4) per worker, the rest serve requests
+threads = 8
+
+# Import the app (and run init_db) once in the master before forking; workers
+# share the precomputed page bytes and module pages copy-on-write
+preload_app = True
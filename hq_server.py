@@ -27,20 +27,53 @@ Patent Claims Supported:
 Author: Kevin Caracozza / NEXUS Team
 """
 
-from flask import Flask, jsonify, request, render_template_string, send_from_directory
+from flask import (Flask, Response, abort, g, has_request_context, jsonify, request,
+                   send_from_directory, stream_with_context)
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from contextlib import contextmanager
+from functools import partial, wraps
+import os
 import sqlite3
+import threading
+import queue
+import atexit
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-import uuid
-import json
+import secrets
+import hashlib
+import gzip
+import re
+import zlib
+import orjson
 
 # ============================================
 # APP SETUP
 # ============================================
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (jsonify, request.get_json)"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
-CORS(app)
+app.json = ORJSONProvider(app)
+
+# Browser origins allowed to call the API (comma-separated). Phone-home routes
+# are only called server-to-server, so they get no CORS headers at all.
+CORS_ORIGINS = os.environ.get(
+    'NEXUS_CORS_ORIGINS',
+    'https://hq.nexuscollectibles.com,https://shop.nexuscollectibles.com'
+).split(',')
+CORS(app, resources={r'^/(?!api/phone-home/).*': {'origins': CORS_ORIGINS}},
+     max_age=86400, supports_credentials=False)
 
 DB_PATH = Path(__file__).parent / 'data' / 'nexus_hq.db'
 DB_PATH.parent.mkdir(exist_ok=True)
@@ -60,17 +93,98 @@ TIERS = {
 # DATABASE
 # ============================================
 
-def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
+# Per-connection tuning. journal_mode=WAL is persistent, so it is set once in
+# init_db(); these have to be applied to every new connection.
+DB_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA busy_timeout=5000',
+)
+
+# One warm connection per worker thread (see get_db)
+_local = threading.local()
+
+def _connect():
+    """Open a tuned connection (autocommit - writers use BEGIN IMMEDIATE)"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
     conn.row_factory = sqlite3.Row
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
-def init_db():
-    """Initialize HQ database"""
+def get_db():
+    """Get this thread's database connection, opening it on first use"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = _local.conn = _connect()
+    return conn
+
+@app.teardown_appcontext
+def finish_db(exc):
+    """Settle any transaction left open by a request - the connection stays pooled"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and conn.in_transaction:
+        if exc is None:
+            conn.commit()
+        else:
+            conn.rollback()
+
+@contextmanager
+def read_snapshot():
+    """Run several reads against one consistent snapshot of the database"""
     conn = get_db()
+    if conn.in_transaction:  # already inside a transaction - reuse its view
+        yield conn
+        return
+    conn.execute('BEGIN')  # deferred: takes no write lock, writers carry on under WAL
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+
+def rows_to_dicts(cursor):
+    """Fetch the remaining rows as plain dicts, reading column names only once"""
+    cols = [d[0] for d in cursor.description]
+    cursor.row_factory = None  # plain tuples - skip building sqlite3.Row objects
+    return [dict(zip(cols, row)) for row in cursor.fetchall()]
+
+# Stored in PRAGMA user_version once init_db() has brought a database up to
+# date. Bump it when adding tables/columns/indexes so existing DBs migrate.
+SCHEMA_VERSION = 2
+
+def stream_json_array(cursor, batch_size=200):
+    """Yield a cursor's rows as JSON array chunks, one fetchmany() batch at a time"""
+    cols = [d[0] for d in cursor.description]
+    cursor.row_factory = None
+    cursor.arraysize = batch_size
+    
+    yield b'['
+    sep = b''
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            break
+        yield sep + b','.join(orjson.dumps(dict(zip(cols, row))) for row in rows)
+        sep = b','
+    yield b']'
+
+def init_db():
+    """Initialize HQ database (no-op once it is at SCHEMA_VERSION)"""
+    # Private connection so nothing is left pooled in the importing thread
+    # (e.g. a gunicorn master that forks workers afterwards)
+    conn = _connect()
     c = conn.cursor()
     
+    c.execute('PRAGMA user_version')
+    if c.fetchone()[0] >= SCHEMA_VERSION:
+        conn.close()
+        return
+    
+    # WAL lets the dashboard read while clients phone home (persists per-DB)
+    c.execute('PRAGMA journal_mode=WAL')
+    
     c.execute('''
         CREATE TABLE IF NOT EXISTS clients (
             id TEXT PRIMARY KEY,
@@ -105,6 +219,28 @@ def init_db():
         )
     ''')
     
+    # Running per-client sales totals, kept up to date by record_sale so the
+    # leaderboard doesn't aggregate the whole sales table
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS client_stats (
+            client_id TEXT PRIMARY KEY,
+            sale_count INTEGER DEFAULT 0,
+            total_volume REAL DEFAULT 0,
+            total_fees REAL DEFAULT 0,
+            FOREIGN KEY (client_id) REFERENCES clients(id)
+        )
+    ''')
+    
+    # Card lists are only needed on demand, so they live outside the hot
+    # sales rows as zlib-compressed JSON
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sale_cards (
+            sale_id TEXT PRIMARY KEY,
+            cards_blob BLOB,
+            FOREIGN KEY (sale_id) REFERENCES sales(id)
+        )
+    ''')
+    
     c.execute('''
         CREATE TABLE IF NOT EXISTS scans (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -152,6 +288,15 @@ def init_db():
         )
     ''')
     
+    # Dashboard events (client changes) shared by all worker processes - each
+    # one relays new rows to its own open streams (see LIVE DASHBOARD EVENTS)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS dashboard_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload BLOB NOT NULL
+        )
+    ''')
+    
     # Add billing columns to clients if not exist
     try:
         c.execute('ALTER TABLE clients ADD COLUMN billing_email TEXT')
@@ -174,6 +319,24 @@ def init_db():
     except:
         pass
     
+    # Indexes for the hot predicates (clients.api_key is already UNIQUE-indexed)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_clients_status ON clients(status)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_sales_client_sold ON sales(client_id, sold_at DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_sales_sold ON sales(sold_at)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_scans_client ON scans(client_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_inv_status ON subscription_invoices(status, client_id)')
+    
+    # Backfill totals for clients that predate client_stats
+    c.execute('''
+        INSERT OR IGNORE INTO client_stats (client_id, sale_count, total_volume, total_fees)
+        SELECT c.id, COUNT(s.id), COALESCE(SUM(s.sale_value), 0), COALESCE(SUM(s.nexus_fee), 0)
+        FROM clients c
+        LEFT JOIN sales s ON c.id = s.client_id
+        GROUP BY c.id
+    ''')
+    c.execute('ANALYZE')
+    
+    c.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.commit()
     conn.close()
     print("[OK] NEXUS HQ Database initialized")
@@ -187,7 +350,18 @@ init_db()
 
 def generate_api_key():
     """Generate unique API key for client"""
-    return f"nxs_{uuid.uuid4().hex[:24]}"
+    return "nxs_" + secrets.token_hex(12)
+
+@app.before_request
+def stamp_request_time():
+    """Take one timestamp per request for all the rows it writes"""
+    g.now_iso = datetime.now().isoformat()
+
+def now_iso():
+    """Current time as ISO string - the request's timestamp when serving one"""
+    if has_request_context() and 'now_iso' in g:
+        return g.now_iso
+    return datetime.now().isoformat()
 
 def get_commission_rate(tier):
     """Get commission rate for a tier"""
@@ -197,123 +371,465 @@ def get_monthly_fee(tier):
     """Get monthly subscription fee for a tier"""
     return TIERS.get(tier, TIERS['starter'])['price']
 
+# Dashboard analytics are polled by every open tab; serve them from memory
+# for a few seconds. Writes that move the numbers clear it.
+_stats_cache = TTLCache(maxsize=16, ttl=5)
+_stats_lock = threading.Lock()
+
+# Serialized /api/dashboard body - every open tab polls it
+_dashboard_cache = TTLCache(maxsize=1, ttl=10)
+
+def stats_cached(name):
+    """Memoize an analytics query in the shared short-TTL stats cache"""
+    return cached(_stats_cache, key=partial(hashkey, name), lock=_stats_lock)
+
+def invalidate_stats():
+    """Drop cached analytics after a write"""
+    with _stats_lock:
+        _stats_cache.clear()
+        _dashboard_cache.clear()
+
+def read_json():
+    """Parse the request body with orjson, skipping Flask's get_json machinery"""
+    try:
+        data = orjson.loads(request.get_data(cache=False) or b'{}')
+    except orjson.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        response = jsonify({'error': 'Request body must be a JSON object'})
+        response.status_code = 400
+        abort(response)
+    return data
+
+def json_response(payload, status=200):
+    """Serialize straight to bytes with orjson (large dashboard payloads)"""
+    return Response(orjson.dumps(payload), status=status, mimetype='application/json')
+
+# ============================================
+# RESPONSE COMPRESSION
+# ============================================
+
+COMPRESS_MIMETYPES = {'application/json', 'text/html', 'text/css', 'text/plain',
+                      'application/javascript'}
+COMPRESS_LEVEL = 6
+COMPRESS_MIN_SIZE = 500
+
+def accepts_gzip():
+    """Whether the current client takes gzip-encoded responses"""
+    return request.accept_encodings.quality('gzip') > 0
+
+def mark_gzipped(response):
+    """Headers for a gzip body - the ETag turns weak since the bytes differ"""
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Gzip text responses on the way out (streams and files pass through)"""
+    if response.mimetype not in COMPRESS_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or not accepts_gzip()):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(data, COMPRESS_LEVEL))
+    return mark_gzipped(response)
+
+# ============================================
+# SQL STATEMENTS (hot paths)
+# ============================================
+# Kept as constants so every call passes the identical string and hits
+# sqlite3's per-connection prepared statement cache.
+
+SQL_INSERT_CLIENT = '''
+    INSERT INTO clients (id, name, email, api_key, subscription_tier,
+                         commission_rate, monthly_fee, created_at, last_seen,
+                         location, contact_phone, notes)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+SQL_AUTH_CLIENT = "SELECT * FROM clients WHERE api_key = ? AND status = 'active'"
+
+SQL_UPDATE_LAST_SEEN = 'UPDATE clients SET last_seen = ? WHERE id = ?'
+
+SQL_CLIENT_COMMISSION = 'SELECT commission_rate FROM clients WHERE id = ?'
+
+SQL_INSERT_SALE = '''
+    INSERT INTO sales (id, client_id, deck_name, format, card_count,
+                       sale_value, nexus_fee, client_keeps, sold_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+SQL_INSERT_SALE_CARDS = 'INSERT INTO sale_cards (sale_id, cards_blob) VALUES (?, ?)'
+
+SQL_INIT_CLIENT_STATS = 'INSERT OR IGNORE INTO client_stats (client_id) VALUES (?)'
+
+SQL_ADD_CLIENT_SALE = '''
+    INSERT INTO client_stats (client_id, sale_count, total_volume, total_fees)
+    VALUES (?, 1, ?, ?)
+    ON CONFLICT(client_id) DO UPDATE SET
+        sale_count = sale_count + 1,
+        total_volume = total_volume + excluded.total_volume,
+        total_fees = total_fees + excluded.total_fees
+'''
+
+# Recompute client_stats from the sales table (all clients when client_id is NULL)
+SQL_REBUILD_CLIENT_STATS = '''
+    INSERT OR REPLACE INTO client_stats (client_id, sale_count, total_volume, total_fees)
+    SELECT c.id, COUNT(s.id), COALESCE(SUM(s.sale_value), 0), COALESCE(SUM(s.nexus_fee), 0)
+    FROM clients c
+    LEFT JOIN sales s ON c.id = s.client_id
+    WHERE :client_id IS NULL OR c.id = :client_id
+    GROUP BY c.id
+'''
+
+SQL_INSERT_SCAN = '''
+    INSERT INTO scans (client_id, card_name, set_code, rarity, price, scanned_at, ai_confidence)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Dashboard reads - constant text so each connection's statement cache keeps the plans
+SQL_SALES_SUMMARY = '''
+    SELECT COUNT(*) as count,
+           COALESCE(SUM(sale_value), 0) as volume,
+           COALESCE(SUM(nexus_fee), 0) as revenue,
+           COALESCE(SUM(CASE WHEN sold_at >= :month THEN 1 ELSE 0 END), 0) as month_count,
+           COALESCE(SUM(CASE WHEN sold_at >= :month THEN sale_value END), 0) as month_volume,
+           COALESCE(SUM(CASE WHEN sold_at >= :month THEN nexus_fee END), 0) as month_revenue,
+           COALESCE(SUM(CASE WHEN sold_at >= :today THEN 1 ELSE 0 END), 0) as today_count,
+           COALESCE(SUM(CASE WHEN sold_at >= :today THEN sale_value END), 0) as today_volume,
+           COALESCE(SUM(CASE WHEN sold_at >= :today THEN nexus_fee END), 0) as today_revenue
+    FROM sales
+'''
+
+SQL_LEADERBOARD = '''
+    SELECT c.id, c.name, c.subscription_tier, c.commission_rate, c.location, c.last_seen,
+           COALESCE(cs.sale_count, 0) as sale_count,
+           COALESCE(cs.total_volume, 0) as total_volume,
+           COALESCE(cs.total_fees, 0) as total_fees
+    FROM clients c
+    LEFT JOIN client_stats cs ON c.id = cs.client_id
+    WHERE c.status = 'active'
+    ORDER BY total_volume DESC
+    LIMIT ? OFFSET ?
+'''
+
+SQL_RECENT_SALES = '''
+    SELECT s.id, s.client_id, s.deck_name, s.format, s.card_count, s.sale_value,
+           s.nexus_fee, s.client_keeps, s.sold_at, c.name as client_name
+    FROM sales s
+    JOIN clients c ON s.client_id = c.id
+    ORDER BY s.sold_at DESC
+    LIMIT ?
+'''
+
+# Changes whenever a sale lands or a dashboard event is published, in any worker
+SQL_DASHBOARD_VERSION = '''
+    SELECT (SELECT COALESCE(MAX(id), 0) FROM dashboard_events),
+           (SELECT COALESCE(MAX(rowid), 0) FROM sales)
+'''
+
 # ============================================
 # CLIENT MANAGEMENT
 # ============================================
 
 def register_client(name, email, tier='starter', location='', phone='', notes=''):
     """Register a new NEXUS client (shop)"""
+    return register_clients_bulk([{
+        'name': name, 'email': email, 'tier': tier,
+        'location': location, 'phone': phone, 'notes': notes
+    }])[0]
+
+def register_clients_bulk(items):
+    """Register many clients in one transaction
+    
+    items are dicts of register_client's arguments; returns one result per
+    item, in order. A duplicate email only fails its own row - SQLite aborts
+    the statement, not the transaction.
+    """
     conn = get_db()
     c = conn.cursor()
+    now = now_iso()
+    results = []
     
-    client_id = str(uuid.uuid4())[:8].upper()
-    api_key = generate_api_key()
-    commission = get_commission_rate(tier)
-    monthly_fee = get_monthly_fee(tier)
-    
+    c.execute('BEGIN IMMEDIATE')
     try:
-        c.execute('''
-            INSERT INTO clients (id, name, email, api_key, subscription_tier, 
-                                commission_rate, monthly_fee, created_at, last_seen, 
-                                location, contact_phone, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (client_id, name, email, api_key, tier, commission, monthly_fee,
-              datetime.now().isoformat(), datetime.now().isoformat(),
-              location, phone, notes))
+        for item in items:
+            tier = item.get('tier', 'starter')
+            client_id = secrets.token_hex(4).upper()
+            api_key = generate_api_key()
+            commission = get_commission_rate(tier)
+            monthly_fee = get_monthly_fee(tier)
+            try:
+                c.execute(SQL_INSERT_CLIENT, (client_id, item['name'], item['email'], api_key, tier,
+                                              commission, monthly_fee, now, now,
+                                              item.get('location', ''), item.get('phone', ''),
+                                              item.get('notes', '')))
+            except sqlite3.IntegrityError as e:
+                results.append({'success': False, 'error': str(e)})
+                continue
+            c.execute(SQL_INIT_CLIENT_STATS, (client_id,))
+            results.append({
+                'success': True,
+                'client_id': client_id,
+                'api_key': api_key,
+                'tier': tier,
+                'commission': commission,
+                'monthly_fee': monthly_fee
+            })
         conn.commit()
-        conn.close()
-        return {
-            'success': True,
-            'client_id': client_id, 
-            'api_key': api_key, 
-            'tier': tier, 
-            'commission': commission,
-            'monthly_fee': monthly_fee
-        }
-    except sqlite3.IntegrityError as e:
-        conn.close()
-        return {'success': False, 'error': str(e)}
+    except Exception:
+        conn.rollback()
+        raise
+    
+    if any(r['success'] for r in results):
+        invalidate_stats()
+    return results
 
 def get_client_by_api_key(api_key):
-    """Authenticate client by API key"""
+    """Authenticate client by API key (last seen is updated in the background)"""
     conn = get_db()
     c = conn.cursor()
-    c.execute('SELECT * FROM clients WHERE api_key = ? AND status = "active"', (api_key,))
+    c.execute(SQL_AUTH_CLIENT, (api_key,))
     row = c.fetchone()
-    conn.close()
     
     if row:
-        # Update last seen
-        update_last_seen(row['id'])
+        touch_last_seen(row['id'])
         return dict(row)
     return None
 
+# Recently authenticated clients by API key, so repeat phone-home calls skip
+# the lookup. Entries are evicted when a client's account changes.
+_auth_cache = TTLCache(maxsize=1024, ttl=60)
+_auth_lock = threading.Lock()
+
+def authenticate_client(api_key):
+    """Authenticate client by API key, served from the auth cache when possible"""
+    with _auth_lock:
+        client = _auth_cache.get(api_key)
+    if client:
+        touch_last_seen(client['id'])
+        return client
+    
+    client = get_client_by_api_key(api_key)
+    if client:
+        with _auth_lock:
+            _auth_cache[api_key] = client
+    return client
+
+def forget_client_auth(client_id):
+    """Evict a client's cached authentication"""
+    with _auth_lock:
+        for key in [k for k, v in _auth_cache.items() if v['id'] == client_id]:
+            _auth_cache.pop(key, None)
+
 def update_last_seen(client_id):
     """Update client's last seen timestamp"""
     conn = get_db()
     c = conn.cursor()
-    c.execute('UPDATE clients SET last_seen = ? WHERE id = ?',
-              (datetime.now().isoformat(), client_id))
+    c.execute('BEGIN IMMEDIATE')
+    c.execute(SQL_UPDATE_LAST_SEEN, (now_iso(), client_id))
     conn.commit()
-    conn.close()
+
+# last_seen is only ever looked at with minute-level precision, so phone-home
+# calls just record it here and a background thread writes the latest value
+# per client every few seconds in one transaction.
+LAST_SEEN_FLUSH_SECONDS = 10
+_last_seen_buf = {}
+_buf_lock = threading.Lock()
+_flusher = None
+
+def touch_last_seen(client_id):
+    """Queue a last seen update for the background flusher"""
+    global _flusher
+    with _buf_lock:
+        _last_seen_buf[client_id] = now_iso()
+        # Started lazily so it runs in the process that serves requests,
+        # not in a pre-fork master
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_last_seen_flusher, name='last-seen-flusher', daemon=True)
+            _flusher.start()
+
+def flush_last_seen():
+    """Write all buffered last seen timestamps in a single transaction"""
+    global _last_seen_buf
+    with _buf_lock:
+        if not _last_seen_buf:
+            return 0
+        pending, _last_seen_buf = _last_seen_buf, {}
+    
+    conn = get_db()
+    c = conn.cursor()
+    try:
+        c.execute('BEGIN IMMEDIATE')
+        c.executemany(SQL_UPDATE_LAST_SEEN, [(ts, cid) for cid, ts in pending.items()])
+        conn.commit()
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.rollback()
+        # Put them back (newer touches win) so the next flush retries
+        with _buf_lock:
+            for cid, ts in pending.items():
+                _last_seen_buf.setdefault(cid, ts)
+        raise
+    return len(pending)
+
+def _last_seen_flusher():
+    """Background loop that periodically flushes the last seen buffer"""
+    while True:
+        time.sleep(LAST_SEEN_FLUSH_SECONDS)
+        try:
+            flush_last_seen()
+        except sqlite3.Error as e:
+            print(f"[!] last_seen flush failed: {e}")
+
+atexit.register(flush_last_seen)
 
 def get_all_clients():
     """Get all registered clients"""
     conn = get_db()
     c = conn.cursor()
     c.execute('SELECT * FROM clients ORDER BY created_at DESC')
-    rows = c.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    return rows_to_dicts(c)
 
 # ============================================
 # SALES TRACKING (PHONE HOME)
 # ============================================
 
-def record_sale(client_id, deck_name, format, card_count, sale_value, cards_json=''):
+def record_sale(client_id, deck_name, format, card_count, sale_value, cards=None):
     """Record a sale reported by a client"""
+    return record_sales_bulk([{
+        'client_id': client_id, 'deck_name': deck_name, 'format': format,
+        'card_count': card_count, 'sale_value': sale_value, 'cards': cards
+    }])[0]
+
+def record_sales_bulk(items):
+    """Record many sales in one transaction
+    
+    items are dicts of record_sale's arguments; returns one result per item,
+    in order. Commission rates are looked up once per client and the inserts
+    go through executemany.
+    """
     conn = get_db()
     c = conn.cursor()
+    now = now_iso()
     
-    # Get client's commission rate
-    c.execute('SELECT commission_rate FROM clients WHERE id = ?', (client_id,))
-    row = c.fetchone()
-    commission_rate = row['commission_rate'] if row else 8.0
-    
-    # Calculate NEXUS fee
-    nexus_fee = round(sale_value * (commission_rate / 100), 2)
-    client_keeps = round(sale_value - nexus_fee, 2)
+    c.execute('BEGIN IMMEDIATE')
+    try:
+        # Get each client's commission rate
+        rates = {}
+        for client_id in {item['client_id'] for item in items}:
+            c.execute(SQL_CLIENT_COMMISSION, (client_id,))
+            row = c.fetchone()
+            rates[client_id] = row['commission_rate'] if row else 8.0
+        
+        sales, sale_cards, stats, results = [], [], [], []
+        for item in items:
+            client_id, sale_value = item['client_id'], item['sale_value']
+            commission_rate = rates[client_id]
+            
+            # Calculate NEXUS fee
+            nexus_fee = round(sale_value * (commission_rate / 100), 2)
+            client_keeps = round(sale_value - nexus_fee, 2)
+            
+            sale_id = "SALE-" + secrets.token_hex(4).upper()
+            
+            sales.append((sale_id, client_id, item['deck_name'], item['format'], item['card_count'],
+                          sale_value, nexus_fee, client_keeps, now))
+            if item.get('cards'):
+                sale_cards.append((sale_id, zlib.compress(orjson.dumps(item['cards']))))
+            stats.append((client_id, sale_value, nexus_fee))
+            results.append({
+                'sale_id': sale_id,
+                'sale_value': sale_value,
+                'nexus_fee': nexus_fee,
+                'client_keeps': client_keeps,
+                'commission_rate': commission_rate
+            })
+        
+        c.executemany(SQL_INSERT_SALE, sales)
+        c.executemany(SQL_INSERT_SALE_CARDS, sale_cards)
+        c.executemany(SQL_ADD_CLIENT_SALE, stats)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     
-    sale_id = f"SALE-{uuid.uuid4().hex[:8].upper()}"
+    invalidate_stats()
+    return results
+
+def recompute_sale_fees(client_id=None):
+    """Recompute fees on past sales from each client's current commission rate
     
+    Admin/backfill helper (e.g. after correcting a client's tier). The whole
+    recompute is one set-based UPDATE inside SQLite rather than a Python loop
+    over rows; client_stats is rebuilt in the same transaction.
+    """
+    conn = get_db()
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
     c.execute('''
-        INSERT INTO sales (id, client_id, deck_name, format, card_count, 
-                          sale_value, nexus_fee, client_keeps, sold_at, cards_json)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (sale_id, client_id, deck_name, format, card_count, sale_value,
-          nexus_fee, client_keeps, datetime.now().isoformat(), cards_json))
-    
+        UPDATE sales
+        SET nexus_fee = ROUND(sales.sale_value * cl.commission_rate / 100.0, 2),
+            client_keeps = ROUND(sales.sale_value - ROUND(sales.sale_value * cl.commission_rate / 100.0, 2), 2)
+        FROM clients cl
+        WHERE cl.id = sales.client_id
+          AND (:client_id IS NULL OR sales.client_id = :client_id)
+    ''', {'client_id': client_id})
+    updated = c.rowcount
+    c.execute(SQL_REBUILD_CLIENT_STATS, {'client_id': client_id})
     conn.commit()
-    conn.close()
+    invalidate_stats()
     
-    return {
-        'sale_id': sale_id,
-        'sale_value': sale_value,
-        'nexus_fee': nexus_fee,
-        'client_keeps': client_keeps,
-        'commission_rate': commission_rate
-    }
+    return {'sales_updated': updated}
+
+def get_sale_cards(sale_id):
+    """Get the card list for a sale, or None if the sale doesn't exist"""
+    conn = get_db()
+    c = conn.cursor()
+    c.execute('''
+        SELECT sc.cards_blob, s.cards_json
+        FROM sales s
+        LEFT JOIN sale_cards sc ON sc.sale_id = s.id
+        WHERE s.id = ?
+    ''', (sale_id,))
+    row = c.fetchone()
+    
+    if not row:
+        return None
+    if row['cards_blob'] is not None:
+        return orjson.loads(zlib.decompress(row['cards_blob']))
+    # Sales recorded before sale_cards existed kept the list inline
+    return orjson.loads(row['cards_json']) if row['cards_json'] else []
 
 def record_scan(client_id, card_name, set_code, rarity='', price=0, confidence=0):
     """Record a card scan from a client"""
     conn = get_db()
     c = conn.cursor()
-    c.execute('''
-        INSERT INTO scans (client_id, card_name, set_code, rarity, price, scanned_at, ai_confidence)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (client_id, card_name, set_code, rarity, price, datetime.now().isoformat(), confidence))
+    c.execute('BEGIN IMMEDIATE')
+    c.execute(SQL_INSERT_SCAN, (client_id, card_name, set_code, rarity, price,
+                                now_iso(), confidence))
     conn.commit()
-    conn.close()
+
+def record_scans(client_id, scans):
+    """Record a batch of card scans in a single transaction"""
+    scanned_at = now_iso()
+    rows = [(client_id, s.get('card_name', ''), s.get('set_code', ''), s.get('rarity', ''),
+             float(s.get('price', 0)), scanned_at, float(s.get('confidence', 0)))
+            for s in scans]
+    
+    conn = get_db()
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
+    c.executemany(SQL_INSERT_SCAN, rows)
+    conn.commit()
+    return len(rows)
 
 
 # ============================================
@@ -325,17 +841,19 @@ def create_invoice(client_id, tier=None):
     conn = get_db()
     c = conn.cursor()
     
+    c.execute('BEGIN IMMEDIATE')
+    
     # Get client info
     c.execute('SELECT subscription_tier, monthly_fee FROM clients WHERE id = ?', (client_id,))
     row = c.fetchone()
     if not row:
-        conn.close()
+        conn.rollback()
         return None
     
     tier = tier or row['subscription_tier']
     amount = TIERS.get(tier, TIERS['starter'])['price']
     
-    invoice_id = f"INV-{uuid.uuid4().hex[:8].upper()}"
+    invoice_id = "INV-" + secrets.token_hex(4).upper()
     period_start = datetime.now()
     period_end = period_start + timedelta(days=30)
     
@@ -344,14 +862,13 @@ def create_invoice(client_id, tier=None):
         (id, client_id, tier, amount, period_start, period_end, status, created_at)
         VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)
     ''', (invoice_id, client_id, tier, amount, period_start.isoformat(), 
-          period_end.isoformat(), datetime.now().isoformat()))
+          period_end.isoformat(), now_iso()))
     
     # Update client's next billing date
     c.execute('UPDATE clients SET next_billing_date = ? WHERE id = ?',
               (period_end.isoformat(), client_id))
     
     conn.commit()
-    conn.close()
     
     return {
         'invoice_id': invoice_id,
@@ -368,14 +885,15 @@ def mark_invoice_paid(invoice_id, payment_method='manual'):
     conn = get_db()
     c = conn.cursor()
     
+    c.execute('BEGIN IMMEDIATE')
     c.execute('''
         UPDATE subscription_invoices 
         SET status = 'paid', paid_at = ?, payment_method = ?
         WHERE id = ?
-    ''', (datetime.now().isoformat(), payment_method, invoice_id))
+    ''', (now_iso(), payment_method, invoice_id))
     
     conn.commit()
-    conn.close()
+    invalidate_stats()
     return True
 
 def get_client_invoices(client_id):
@@ -384,7 +902,6 @@ def get_client_invoices(client_id):
     c = conn.cursor()
     c.execute('SELECT * FROM subscription_invoices WHERE client_id = ? ORDER BY created_at DESC', (client_id,))
     rows = c.fetchall()
-    conn.close()
     return [dict(row) for row in rows]
 
 def get_pending_invoices():
@@ -398,10 +915,9 @@ def get_pending_invoices():
         WHERE i.status = 'pending'
         ORDER BY i.created_at
     ''')
-    rows = c.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    return rows_to_dicts(c)
 
+@stats_cached('subscription_revenue')
 def get_subscription_revenue():
     """Get subscription revenue stats"""
     conn = get_db()
@@ -438,8 +954,6 @@ def get_subscription_revenue():
     ''')
     tier_breakdown = [dict(row) for row in c.fetchall()]
     
-    conn.close()
-    
     return {
         'mrr': round(mrr, 2),
         'month_collected': round(month_collected, 2),
@@ -458,6 +972,7 @@ def change_client_tier(client_id, new_tier):
     c = conn.cursor()
     
     tier_info = TIERS[new_tier]
+    c.execute('BEGIN IMMEDIATE')
     c.execute('''
         UPDATE clients 
         SET subscription_tier = ?, commission_rate = ?, monthly_fee = ?
@@ -465,7 +980,8 @@ def change_client_tier(client_id, new_tier):
     ''', (new_tier, tier_info['commission'], tier_info['price'], client_id))
     
     conn.commit()
-    conn.close()
+    invalidate_stats()
+    forget_client_auth(client_id)
     
     return {
         'success': True,
@@ -489,7 +1005,6 @@ def generate_monthly_invoices():
     ''', (today,))
     
     clients_due = c.fetchall()
-    conn.close()
     
     invoices_created = []
     for row in clients_due:
@@ -504,8 +1019,8 @@ def generate_monthly_invoices():
 # ANALYTICS & DASHBOARD
 # ============================================
 
-def get_dashboard_stats():
-    """Get stats for HQ dashboard"""
+def query_dashboard_stats():
+    """Compute the HQ dashboard stats (uncached)"""
     conn = get_db()
     c = conn.cursor()
     
@@ -513,34 +1028,20 @@ def get_dashboard_stats():
     c.execute('SELECT COUNT(*) as count FROM clients WHERE status = "active"')
     total_clients = c.fetchone()['count']
     
-    # Total sales
-    c.execute('SELECT COUNT(*) as count, COALESCE(SUM(sale_value), 0) as volume, COALESCE(SUM(nexus_fee), 0) as revenue FROM sales')
+    # Sales: all-time, this month and today in a single pass over the table
+    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0).isoformat()
+    today_start = datetime.now().replace(hour=0, minute=0, second=0).isoformat()
+    c.execute(SQL_SALES_SUMMARY, {'month': month_start, 'today': today_start})
     row = c.fetchone()
     total_sales = row['count']
     total_volume = row['volume']
     total_revenue = row['revenue']
-    
-    # This month
-    month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0).isoformat()
-    c.execute('''
-        SELECT COUNT(*) as count, COALESCE(SUM(sale_value), 0) as volume, COALESCE(SUM(nexus_fee), 0) as revenue 
-        FROM sales WHERE sold_at >= ?
-    ''', (month_start,))
-    row = c.fetchone()
-    month_sales = row['count']
-    month_volume = row['volume']
-    month_revenue = row['revenue']
-    
-    # Today
-    today_start = datetime.now().replace(hour=0, minute=0, second=0).isoformat()
-    c.execute('''
-        SELECT COUNT(*) as count, COALESCE(SUM(sale_value), 0) as volume, COALESCE(SUM(nexus_fee), 0) as revenue 
-        FROM sales WHERE sold_at >= ?
-    ''', (today_start,))
-    row = c.fetchone()
-    today_sales = row['count']
-    today_volume = row['volume']
-    today_revenue = row['revenue']
+    month_sales = row['month_count']
+    month_volume = row['month_volume']
+    month_revenue = row['month_revenue']
+    today_sales = row['today_count']
+    today_volume = row['today_volume']
+    today_revenue = row['today_revenue']
     
     # Network stats
     c.execute('SELECT COUNT(*) as count FROM scans')
@@ -553,8 +1054,6 @@ def get_dashboard_stats():
     c.execute('SELECT COALESCE(SUM(monthly_fee), 0) as mrr FROM clients WHERE status = "active"')
     mrr = c.fetchone()['mrr']
     
-    conn.close()
-    
     return {
         'clients': {'total': total_clients, 'active': total_clients},
         'sales': {'total': total_sales, 'today': today_sales, 'this_month': month_sales},
@@ -568,45 +1067,202 @@ def get_dashboard_stats():
         'network': {'total_scans': total_scans, 'pending_disputes': pending_disputes}
     }
 
-def get_client_leaderboard():
-    """Get top clients by sales volume"""
+@stats_cached('dashboard_stats')
+def get_dashboard_stats():
+    """Get stats for HQ dashboard"""
+    return query_dashboard_stats()
+
+def query_client_leaderboard(limit=None, offset=0):
+    """Run the leaderboard query (uncached)"""
     conn = get_db()
     c = conn.cursor()
     
-    c.execute('''
-        SELECT c.id, c.name, c.subscription_tier, c.commission_rate, c.location, c.last_seen,
-               COUNT(s.id) as sale_count,
-               COALESCE(SUM(s.sale_value), 0) as total_volume,
-               COALESCE(SUM(s.nexus_fee), 0) as total_fees
-        FROM clients c
-        LEFT JOIN sales s ON c.id = s.client_id
-        WHERE c.status = 'active'
-        GROUP BY c.id
-        ORDER BY total_volume DESC
-    ''')
-    
-    rows = c.fetchall()
-    conn.close()
+    c.execute(SQL_LEADERBOARD, (-1 if limit is None else limit, offset))
     
-    return [dict(row) for row in rows]
+    return rows_to_dicts(c)
+
+@stats_cached('leaderboard')
+def get_client_leaderboard(limit=None, offset=0):
+    """Get top clients by sales volume (all of them unless limit is given)"""
+    return query_client_leaderboard(limit, offset)
+
+def query_recent_sales(limit=50):
+    """Run the recent sales query and return the open cursor"""
+    c = get_db().cursor()
+    c.execute(SQL_RECENT_SALES, (limit,))
+    return c
 
 def get_recent_sales(limit=50):
     """Get recent sales across all clients"""
-    conn = get_db()
-    c = conn.cursor()
-    
-    c.execute('''
-        SELECT s.*, c.name as client_name
-        FROM sales s
-        JOIN clients c ON s.client_id = c.id
-        ORDER BY s.sold_at DESC
-        LIMIT ?
-    ''', (limit,))
-    
-    rows = c.fetchall()
-    conn.close()
+    return rows_to_dicts(query_recent_sales(limit))
+
+def get_dashboard_payload():
+    """Serialized dashboard JSON, its gzip encoding and ETag, built at most once per TTL"""
+    # Keyed on the data version so no worker serves a copy older than the
+    # last sale or client change, whichever process wrote it
+    version = tuple(get_db().execute(SQL_DASHBOARD_VERSION).fetchone())
+    return build_dashboard_payload(version)
+
+@cached(_dashboard_cache, key=partial(hashkey, 'dashboard'), lock=_stats_lock)
+def build_dashboard_payload(version):
+    """Build the dashboard JSON for one data version"""
+    # One read transaction so stats, leaderboard and recent sales agree - the
+    # uncached queries, since a cached part may predate the snapshot
+    with read_snapshot():
+        payload = orjson.dumps({
+            'stats': query_dashboard_stats(),
+            'leaderboard': query_client_leaderboard(),
+            'recent_sales': get_recent_sales(20)
+        })
+    # Compressed once here rather than by compress_response on every poll
+    gzipped = gzip.compress(payload, COMPRESS_LEVEL, mtime=0)
+    return payload, gzipped, hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+# ============================================
+# LIVE DASHBOARD EVENTS
+# ============================================
+# Pub/sub behind /api/dashboard/stream, shared by every gunicorn worker through
+# the database: a relay thread per process watches the scans and sales tables
+# (plus dashboard_events for resyncs) and fans deltas out to that process's
+# open streams. Phone-home requests write nothing extra.
+
+SSE_HEARTBEAT_SECONDS = 15
+SSE_QUEUE_SIZE = 256
+SSE_POLL_SECONDS = 0.5
+SSE_EVENT_KEEP = 1000  # rows kept in dashboard_events; a relay further behind resyncs
+# Each stream holds a worker thread for as long as it is open; cap them so the
+# rest of the gthread pool (threads = 8 in gunicorn.conf.py) keeps serving requests
+SSE_MAX_STREAMS = int(os.environ.get('NEXUS_SSE_MAX_STREAMS', 4))
+SSE_RESYNC = b'data: {"type":"resync"}\n\n'
+
+SQL_INSERT_EVENT = 'INSERT INTO dashboard_events (payload) VALUES (?)'
+SQL_PRUNE_EVENTS = 'DELETE FROM dashboard_events WHERE id <= ?'
+SQL_EVENTS_BETWEEN = 'SELECT id, payload FROM dashboard_events WHERE id > ? AND id <= ? ORDER BY id'
+# Newest event, scan and sale - the relay reads only past its last marks
+SQL_EVENT_MARKS = '''
+    SELECT (SELECT COALESCE(MAX(id), 0) FROM dashboard_events),
+           (SELECT COALESCE(MAX(id), 0) FROM scans),
+           (SELECT COALESCE(MAX(rowid), 0) FROM sales)
+'''
+SQL_SCANS_BETWEEN = 'SELECT COUNT(*) FROM scans WHERE id > ? AND id <= ?'
+SQL_SALES_BETWEEN = '''
+    SELECT s.id, s.client_id, s.deck_name, s.format, s.card_count, s.sale_value,
+           s.nexus_fee, s.client_keeps, s.sold_at, c.name as client_name
+    FROM sales s
+    JOIN clients c ON s.client_id = c.id
+    WHERE s.rowid > ? AND s.rowid <= ?
+    ORDER BY s.rowid
+'''
+
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+_relay = None
+
+def publish_event(event):
+    """Record a dashboard event for the open streams of every worker
     
-    return [dict(row) for row in rows]
+    Only for changes the relay can't derive from scans/sales (it sends
+    {'type': 'resync'} after client changes).
+    """
+    try:
+        get_db().execute(SQL_INSERT_EVENT, (orjson.dumps(event),))
+    except sqlite3.Error as e:
+        # The write it describes has already committed; pages catch up on
+        # their next full load
+        print(f"[!] dashboard event publish failed: {e}")
+
+def fan_out(message):
+    """Push one SSE message to every open stream in this process"""
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for q in subscribers:
+        try:
+            q.put_nowait(message)
+        except queue.Full:
+            # Too far behind to replay deltas - have it reload everything instead
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                q.put_nowait(SSE_RESYNC)
+            except queue.Full:
+                pass
+
+def relay_changes(conn, last, marks):
+    """Fan out everything between the last marks and the new ones"""
+    last_event, last_scan, last_sale = last
+    event_mark, scan_mark, sale_mark = marks
+    
+    events = conn.execute(SQL_EVENTS_BETWEEN, (last_event, event_mark)).fetchall()
+    # Events pruned past us, or more sales than a queue holds - reload everything
+    if (events and events[0][0] > last_event + 1) or sale_mark - last_sale > SSE_QUEUE_SIZE:
+        fan_out(SSE_RESYNC)
+        return
+    for _, payload in events:
+        fan_out(b'data: ' + payload + b'\n\n')
+    
+    if scan_mark > last_scan:
+        count = conn.execute(SQL_SCANS_BETWEEN, (last_scan, scan_mark)).fetchone()[0]
+        if count:
+            fan_out(b'data: ' + orjson.dumps({'type': 'scans', 'count': count}) + b'\n\n')
+    if sale_mark > last_sale:
+        for sale in rows_to_dicts(conn.execute(SQL_SALES_BETWEEN, (last_sale, sale_mark))):
+            fan_out(b'data: ' + orjson.dumps({'type': 'sale', 'sale': sale}) + b'\n\n')
+
+def _event_relay(last):
+    """Background loop: forward new events, scans and sales to this process's streams"""
+    conn = get_db()  # the relay thread's own connection
+    pruned = 0
+    while True:
+        time.sleep(SSE_POLL_SECONDS)
+        try:
+            marks = tuple(conn.execute(SQL_EVENT_MARKS).fetchone())
+            if marks == last:
+                continue
+            # Another worker wrote - don't serve this process's cached numbers
+            invalidate_stats()
+            relay_changes(conn, last, marks)
+            last = marks
+            if marks[0] - SSE_EVENT_KEEP > pruned:
+                pruned = marks[0] - SSE_EVENT_KEEP
+                conn.execute(SQL_PRUNE_EVENTS, (pruned,))
+        except sqlite3.Error as e:
+            print(f"[!] dashboard event relay failed: {e}")
+
+def subscribe():
+    """Register a stream queue, or None when this process is at SSE_MAX_STREAMS"""
+    global _relay
+    # Read before taking the lock; only used if the relay has to be started
+    marks = tuple(get_db().execute(SQL_EVENT_MARKS).fetchone())
+    with _subscribers_lock:
+        if len(_subscribers) >= SSE_MAX_STREAMS:
+            return None
+        q = queue.Queue(SSE_QUEUE_SIZE)
+        _subscribers.add(q)
+        # Started lazily so it runs in the process that serves requests, not
+        # in a pre-fork master; it relays everything after the current marks
+        if _relay is None or not _relay.is_alive():
+            _relay = threading.Thread(target=_event_relay, args=(marks,),
+                                      name='dashboard-event-relay', daemon=True)
+            _relay.start()
+    return q
+
+def unsubscribe(q):
+    """Drop a stream queue once its response is closed"""
+    with _subscribers_lock:
+        _subscribers.discard(q)
+
+def event_stream(q):
+    """Yield server-sent events for one subscriber until it disconnects"""
+    yield b'retry: 5000\n\n'
+    while True:
+        try:
+            yield q.get(timeout=SSE_HEARTBEAT_SECONDS)
+        except queue.Empty:
+            yield b': ping\n\n'  # keeps proxies from closing an idle stream
 
 
 # ============================================
@@ -620,7 +1276,7 @@ def health():
         'status': 'healthy',
         'service': 'NEXUS HQ',
         'version': '1.0.0',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': now_iso()
     })
 
 @app.route('/api/status')
@@ -651,7 +1307,7 @@ def list_clients():
 @app.route('/api/clients/register', methods=['POST'])
 def api_register_client():
     """Register a new client"""
-    data = request.get_json()
+    data = read_json()
     
     required = ['name', 'email']
     for field in required:
@@ -668,6 +1324,7 @@ def api_register_client():
     )
     
     if result.get('success'):
+        publish_event({'type': 'resync'})
         return jsonify(result), 201
     else:
         return jsonify(result), 400
@@ -679,7 +1336,6 @@ def get_client(client_id):
     c = conn.cursor()
     c.execute('SELECT * FROM clients WHERE id = ?', (client_id,))
     row = c.fetchone()
-    conn.close()
     
     if row:
         client = dict(row)
@@ -704,7 +1360,7 @@ def subscription_revenue():
 @app.route('/api/subscriptions/invoices', methods=['GET'])
 def list_invoices():
     """List all pending invoices"""
-    return jsonify({'invoices': get_pending_invoices()})
+    return json_response({'invoices': get_pending_invoices()})
 
 @app.route('/api/subscriptions/invoices/<client_id>', methods=['GET'])
 def client_invoices(client_id):
@@ -714,7 +1370,7 @@ def client_invoices(client_id):
 @app.route('/api/subscriptions/invoices/create', methods=['POST'])
 def create_client_invoice():
     """Create an invoice for a client"""
-    data = request.get_json()
+    data = read_json()
     client_id = data.get('client_id')
     tier = data.get('tier')
     
@@ -729,7 +1385,7 @@ def create_client_invoice():
 @app.route('/api/subscriptions/invoices/<invoice_id>/pay', methods=['POST'])
 def pay_invoice(invoice_id):
     """Mark an invoice as paid"""
-    data = request.get_json() or {}
+    data = read_json()
     payment_method = data.get('payment_method', 'manual')
     
     mark_invoice_paid(invoice_id, payment_method)
@@ -738,7 +1394,7 @@ def pay_invoice(invoice_id):
 @app.route('/api/subscriptions/client/<client_id>/tier', methods=['PUT'])
 def update_client_tier(client_id):
     """Change a client's subscription tier"""
-    data = request.get_json()
+    data = read_json()
     new_tier = data.get('tier')
     
     if not new_tier:
@@ -746,6 +1402,7 @@ def update_client_tier(client_id):
     
     result = change_client_tier(client_id, new_tier)
     if result.get('success'):
+        publish_event({'type': 'resync'})
         return jsonify(result)
     return jsonify(result), 400
 
@@ -763,28 +1420,39 @@ def trigger_invoice_generation():
 # API ROUTES - PHONE HOME (Clients report here)
 # ============================================
 
+def require_api_key(f):
+    """Decorator to authenticate a client by API key (sets g.client)"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
+        
+        if not api_key:
+            return jsonify({'error': 'Missing API key'}), 401
+        
+        client = authenticate_client(api_key)
+        if not client:
+            return jsonify({'error': 'Invalid API key'}), 401
+        
+        g.client = client
+        return f(*args, **kwargs)
+    return decorated
+
 @app.route('/api/phone-home/sale', methods=['POST'])
+@require_api_key
 def phone_home_sale():
     """Client reports a sale - THIS IS THE MONEY ENDPOINT"""
-    # Authenticate via API key
-    api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
-    
-    if not api_key:
-        return jsonify({'error': 'Missing API key'}), 401
-    
-    client = get_client_by_api_key(api_key)
-    if not client:
-        return jsonify({'error': 'Invalid API key'}), 401
-    
-    data = request.get_json()
+    data = read_json()
+    deck_name = data.get('deck_name', 'Unknown Deck')
+    format = data.get('format', 'Unknown')
+    card_count = data.get('card_count', 0)
     
     result = record_sale(
-        client_id=client['id'],
-        deck_name=data.get('deck_name', 'Unknown Deck'),
-        format=data.get('format', 'Unknown'),
-        card_count=data.get('card_count', 0),
+        client_id=g.client['id'],
+        deck_name=deck_name,
+        format=format,
+        card_count=card_count,
         sale_value=float(data.get('sale_value', 0)),
-        cards_json=json.dumps(data.get('cards', []))
+        cards=data.get('cards', [])
     )
     
     return jsonify({
@@ -794,21 +1462,13 @@ def phone_home_sale():
     })
 
 @app.route('/api/phone-home/scan', methods=['POST'])
+@require_api_key
 def phone_home_scan():
     """Client reports a card scan"""
-    api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
-    
-    if not api_key:
-        return jsonify({'error': 'Missing API key'}), 401
-    
-    client = get_client_by_api_key(api_key)
-    if not client:
-        return jsonify({'error': 'Invalid API key'}), 401
-    
-    data = request.get_json()
+    data = read_json()
     
     record_scan(
-        client_id=client['id'],
+        client_id=g.client['id'],
         card_name=data.get('card_name', ''),
         set_code=data.get('set_code', ''),
         rarity=data.get('rarity', ''),
@@ -819,31 +1479,12 @@ def phone_home_scan():
     return jsonify({'success': True, 'message': 'Scan recorded'})
 
 @app.route('/api/phone-home/batch-scans', methods=['POST'])
+@require_api_key
 def phone_home_batch_scans():
     """Client reports multiple scans at once"""
-    api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
-    
-    if not api_key:
-        return jsonify({'error': 'Missing API key'}), 401
-    
-    client = get_client_by_api_key(api_key)
-    if not client:
-        return jsonify({'error': 'Invalid API key'}), 401
-    
-    data = request.get_json()
-    scans = data.get('scans', [])
-    
-    for scan in scans:
-        record_scan(
-            client_id=client['id'],
-            card_name=scan.get('card_name', ''),
-            set_code=scan.get('set_code', ''),
-            rarity=scan.get('rarity', ''),
-            price=float(scan.get('price', 0)),
-            confidence=float(scan.get('confidence', 0))
-        )
-    
-    return jsonify({'success': True, 'recorded': len(scans)})
+    data = read_json()
+    recorded = record_scans(g.client['id'], data.get('scans', []))
+    return jsonify({'success': True, 'recorded': recorded})
 
 
 # ============================================
@@ -852,12 +1493,28 @@ def phone_home_batch_scans():
 
 @app.route('/api/dashboard')
 def api_dashboard():
-    """Get full dashboard data"""
-    return jsonify({
-        'stats': get_dashboard_stats(),
-        'leaderboard': get_client_leaderboard(),
-        'recent_sales': get_recent_sales(20)
-    })
+    """Get full dashboard data (304 when unchanged since the caller's copy)"""
+    payload, payload_gzip, etag = get_dashboard_payload()
+    gzipped = accepts_gzip()
+    response = Response(payload_gzip if gzipped else payload, mimetype='application/json',
+                        headers={'Cache-Control': 'max-age=10'})
+    response.set_etag(etag)
+    if gzipped:
+        mark_gzipped(response)
+    return response.make_conditional(request)
+
+@app.route('/api/dashboard/stream')
+def api_dashboard_stream():
+    """Server-sent dashboard deltas (new sales, scans, client changes)"""
+    q = subscribe()
+    if q is None:
+        # EventSource gives up on a non-200; the page falls back to polling
+        return jsonify({'error': 'Too many live streams'}), 503
+    response = Response(event_stream(q), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs even if the client goes away before the generator starts
+    response.call_on_close(partial(unsubscribe, q))
+    return response
 
 @app.route('/api/dashboard/stats')
 def api_dashboard_stats():
@@ -866,14 +1523,29 @@ def api_dashboard_stats():
 
 @app.route('/api/dashboard/leaderboard')
 def api_dashboard_leaderboard():
-    """Get client leaderboard"""
-    return jsonify(get_client_leaderboard())
+    """Get client leaderboard (optional ?limit=&offset= paging)"""
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    return json_response(get_client_leaderboard(limit, offset))
 
 @app.route('/api/dashboard/sales')
 def api_dashboard_sales():
-    """Get recent sales"""
+    """Get recent sales (streamed - large limits never sit in memory at once)"""
     limit = request.args.get('limit', 50, type=int)
-    return jsonify(get_recent_sales(limit))
+    rows = stream_json_array(query_recent_sales(limit))
+    return Response(stream_with_context(rows), mimetype='application/json')
+
+# ============================================
+# API ROUTES - SALES
+# ============================================
+
+@app.route('/api/sales/<sale_id>/cards')
+def api_sale_cards(sale_id):
+    """Get the card list for a sale (loaded on demand)"""
+    cards = get_sale_cards(sale_id)
+    if cards is None:
+        return jsonify({'error': 'Sale not found'}), 404
+    return json_response({'sale_id': sale_id, 'cards': cards})
 
 # ============================================
 # WEB DASHBOARD (HTML)
@@ -927,58 +1599,9 @@ DASHBOARD_HTML = '''
         .stat-card .value { font-size: 32px; font-weight: bold; color: #fff; }
         .stat-card.gold .value { color: #d4af37; }
         .stat-card .sub { font-size: 12px; color: #666; margin-top: 5px; }
-        
-        .section { margin-bottom: 30px; }
-        .section h2 { 
-            color: #d4af37; 
-            font-size: 18px; 
-            margin-bottom: 15px;
-            padding-bottom: 10px;
-            border-bottom: 1px solid #333;
-        }
-        
-        table { width: 100%; border-collapse: collapse; }
-        th, td { padding: 12px 15px; text-align: left; border-bottom: 1px solid #222; }
-        th { background: #1a1a2e; color: #d4af37; font-size: 12px; text-transform: uppercase; }
-        tr:hover { background: #1a1a2e; }
-        .money { color: #4CAF50; }
-        .fee { color: #d4af37; }
-        .tier { 
-            padding: 3px 8px; 
-            border-radius: 4px; 
-            font-size: 11px;
-            text-transform: uppercase;
-        }
-        .tier.starter { background: #333; color: #888; }
-        .tier.professional { background: #1a365d; color: #63b3ed; }
-        .tier.enterprise { background: #553c9a; color: #b794f4; }
-        .tier.founders { background: #744210; color: #d4af37; }
-        
-        .refresh-btn {
-            background: #d4af37;
-            color: #000;
-            border: none;
-            padding: 10px 20px;
-            border-radius: 5px;
-            cursor: pointer;
-            font-weight: bold;
-        }
-        .refresh-btn:hover { background: #c9a227; }
-        
-        .live-indicator {
-            display: inline-block;
-            width: 8px;
-            height: 8px;
-            background: #4CAF50;
-            border-radius: 50%;
-            margin-right: 8px;
-            animation: pulse 2s infinite;
-        }
-        @keyframes pulse {
-            0%, 100% { opacity: 1; }
-            50% { opacity: 0.5; }
-        }
     </style>
+    <link rel="preload" href="__DASHBOARD_CSS__" as="style" onload="this.onload=null;this.rel='stylesheet'">
+    <noscript><link rel="stylesheet" href="__DASHBOARD_CSS__"></noscript>
 </head>
 <body>
     <div class="header">
@@ -1025,100 +1648,289 @@ DASHBOARD_HTML = '''
         
         <div class="section">
             <h2>Client Leaderboard</h2>
-            <table id="leaderboard">
-                <thead>
-                    <tr>
-                        <th>Client</th>
-                        <th>Location</th>
-                        <th>Tier</th>
-                        <th>Sales</th>
-                        <th>Volume</th>
-                        <th>NEXUS Fees</th>
-                        <th>Last Seen</th>
-                    </tr>
-                </thead>
-                <tbody></tbody>
-            </table>
+            <div class="table-scroll">
+                <table id="leaderboard">
+                    <thead>
+                        <tr>
+                            <th>Client</th>
+                            <th>Location</th>
+                            <th>Tier</th>
+                            <th>Sales</th>
+                            <th>Volume</th>
+                            <th>NEXUS Fees</th>
+                            <th>Last Seen</th>
+                        </tr>
+                    </thead>
+                    <tbody></tbody>
+                </table>
+            </div>
         </div>
         
         <div class="section">
             <h2>Recent Sales <button class="refresh-btn" onclick="loadData()">Refresh</button></h2>
-            <table id="recent-sales">
-                <thead>
-                    <tr>
-                        <th>Time</th>
-                        <th>Client</th>
-                        <th>Deck</th>
-                        <th>Format</th>
-                        <th>Cards</th>
-                        <th>Sale Value</th>
-                        <th>NEXUS Fee</th>
-                    </tr>
-                </thead>
-                <tbody></tbody>
-            </table>
+            <div class="table-scroll">
+                <table id="recent-sales">
+                    <thead>
+                        <tr>
+                            <th>Time</th>
+                            <th>Client</th>
+                            <th>Deck</th>
+                            <th>Format</th>
+                            <th>Cards</th>
+                            <th>Sale Value</th>
+                            <th>NEXUS Fee</th>
+                        </tr>
+                    </thead>
+                    <tbody></tbody>
+                </table>
+            </div>
         </div>
     </div>
     
     <script>
+        const fmtMoney = v => '$' + v.toFixed(2);
+        let lastEtag = null;
+        
+        // Only touch the DOM when the text actually changed
+        function setText(el, text) {
+            text = String(text);
+            if (el.textContent !== text) el.textContent = text;
+        }
+        
+        // Keyed table update: each item keeps its own <tr>, and only rows whose
+        // cell values changed are rewritten (no innerHTML rebuild per refresh).
+        // A cell is {text, cls} or {text, wrap: 'strong'|'span', wrapCls}.
+        function syncRows(tbody, rowMap, items, keyOf, cellsOf) {
+            const seen = new Set();
+            items.forEach((item, i) => {
+                const key = keyOf(item);
+                const cells = cellsOf(item);
+                const sig = cells.map(c => c.text + '|' + (c.wrapCls || '')).join('~');
+                seen.add(key);
+                
+                let tr = rowMap.get(key);
+                if (!tr) {
+                    tr = document.createElement('tr');
+                    for (const c of cells) {
+                        const td = tr.appendChild(document.createElement('td'));
+                        if (c.cls) td.className = c.cls;
+                        if (c.wrap) td.appendChild(document.createElement(c.wrap));
+                    }
+                    rowMap.set(key, tr);
+                }
+                if (tr.dataset.sig !== sig) {
+                    cells.forEach((c, j) => {
+                        const target = c.wrap ? tr.children[j].firstChild : tr.children[j];
+                        if (c.wrapCls !== undefined && target.className !== c.wrapCls) target.className = c.wrapCls;
+                        setText(target, c.text);
+                    });
+                    tr.dataset.sig = sig;
+                }
+                if (tbody.children[i] !== tr) tbody.insertBefore(tr, tbody.children[i] || null);
+            });
+            for (const [key, tr] of rowMap) {
+                if (!seen.has(key)) {
+                    tr.remove();
+                    rowMap.delete(key);
+                }
+            }
+        }
+        
+        // Tables longer than VIRTUALIZE_ABOVE rows only keep the rows in view
+        // (plus OVERSCAN either side) in the DOM; spacer <tbody>s stand in for
+        // the rest so the scrollbar keeps its full length.
+        const ROW_HEIGHT = 40;
+        const VIRTUALIZE_ABOVE = 100;
+        const OVERSCAN = 10;
+        
+        function makeSpacer(cols) {
+            const body = document.createElement('tbody');
+            body.className = 'spacer';
+            const td = body.appendChild(document.createElement('tr')).appendChild(document.createElement('td'));
+            td.colSpan = cols;
+            return body;
+        }
+        
+        function setSpacer(body, px) {
+            body.style.display = px ? '' : 'none';
+            body.firstChild.firstChild.style.height = px + 'px';
+        }
+        
+        function makeTable(id, keyOf, cellsOf) {
+            const table = document.getElementById(id);
+            const tbody = table.tBodies[0];
+            const scroller = table.parentElement;
+            const cols = table.tHead.rows[0].cells.length;
+            const top = table.insertBefore(makeSpacer(cols), tbody);
+            const bottom = table.appendChild(makeSpacer(cols));
+            const rowMap = new Map();
+            let items = [];
+            let frame = 0;
+            
+            function render() {
+                frame = 0;
+                const virtual = items.length > VIRTUALIZE_ABOVE;
+                scroller.classList.toggle('virtual', virtual);
+                let start = 0, end = items.length;
+                if (virtual) {
+                    const offset = Math.max(0, scroller.scrollTop - table.tHead.offsetHeight);
+                    start = Math.max(0, Math.floor(offset / ROW_HEIGHT) - OVERSCAN);
+                    end = Math.min(items.length,
+                                   start + Math.ceil(scroller.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN);
+                }
+                syncRows(tbody, rowMap, items.slice(start, end), keyOf, cellsOf);
+                setSpacer(top, start * ROW_HEIGHT);
+                setSpacer(bottom, (items.length - end) * ROW_HEIGHT);
+            }
+            
+            // Coalesce scroll events to one render per frame
+            scroller.addEventListener('scroll', () => {
+                if (!frame && items.length > VIRTUALIZE_ABOVE) frame = requestAnimationFrame(render);
+            }, {passive: true});
+            
+            return data => { items = data; render(); };
+        }
+        
+        const leaderboardCells = c => [
+            {text: c.name, wrap: 'strong'},
+            {text: c.location || '-'},
+            {text: c.subscription_tier, wrap: 'span', wrapCls: 'tier ' + c.subscription_tier},
+            {text: c.sale_count},
+            {text: fmtMoney(c.total_volume), cls: 'money'},
+            {text: fmtMoney(c.total_fees), cls: 'fee'},
+            {text: c.last_seen ? new Date(c.last_seen).toLocaleDateString() : '-'},
+        ];
+        
+        const saleCells = s => [
+            {text: new Date(s.sold_at).toLocaleString()},
+            {text: s.client_name},
+            {text: s.deck_name},
+            {text: s.format},
+            {text: s.card_count},
+            {text: fmtMoney(s.sale_value), cls: 'money'},
+            {text: fmtMoney(s.nexus_fee), cls: 'fee'},
+        ];
+        
+        const showLeaderboard = makeTable('leaderboard', c => c.id, leaderboardCells);
+        const showRecentSales = makeTable('recent-sales', s => s.id, saleCells);
+        
+        let current = null;
+        
+        function render(data) {
+            setText(document.getElementById('mrr'), fmtMoney(data.stats.revenue.mrr));
+            setText(document.getElementById('month-fees'), fmtMoney(data.stats.revenue.month_fees));
+            setText(document.getElementById('clients'), data.stats.clients.total);
+            setText(document.getElementById('volume'), fmtMoney(data.stats.volume.this_month));
+            setText(document.getElementById('sales'), data.stats.sales.this_month);
+            setText(document.getElementById('scans'), data.stats.network.total_scans.toLocaleString());
+            
+            showLeaderboard(data.leaderboard);
+            showRecentSales(data.recent_sales);
+        }
+        
         async function loadData() {
             try {
-                const res = await fetch('/api/dashboard');
-                const data = await res.json();
-                
-                // Stats
-                document.getElementById('mrr').textContent = '$' + data.stats.revenue.mrr.toFixed(2);
-                document.getElementById('month-fees').textContent = '$' + data.stats.revenue.month_fees.toFixed(2);
-                document.getElementById('clients').textContent = data.stats.clients.total;
-                document.getElementById('volume').textContent = '$' + data.stats.volume.this_month.toFixed(2);
-                document.getElementById('sales').textContent = data.stats.sales.this_month;
-                document.getElementById('scans').textContent = data.stats.network.total_scans.toLocaleString();
-                
-                // Leaderboard
-                const lb = document.querySelector('#leaderboard tbody');
-                lb.innerHTML = data.leaderboard.map(c => `
-                    <tr>
-                        <td><strong>${c.name}</strong></td>
-                        <td>${c.location || '-'}</td>
-                        <td><span class="tier ${c.subscription_tier}">${c.subscription_tier}</span></td>
-                        <td>${c.sale_count}</td>
-                        <td class="money">$${c.total_volume.toFixed(2)}</td>
-                        <td class="fee">$${c.total_fees.toFixed(2)}</td>
-                        <td>${c.last_seen ? new Date(c.last_seen).toLocaleDateString() : '-'}</td>
-                    </tr>
-                `).join('');
-                
-                // Recent sales
-                const rs = document.querySelector('#recent-sales tbody');
-                rs.innerHTML = data.recent_sales.map(s => `
-                    <tr>
-                        <td>${new Date(s.sold_at).toLocaleString()}</td>
-                        <td>${s.client_name}</td>
-                        <td>${s.deck_name}</td>
-                        <td>${s.format}</td>
-                        <td>${s.card_count}</td>
-                        <td class="money">$${s.sale_value.toFixed(2)}</td>
-                        <td class="fee">$${s.nexus_fee.toFixed(2)}</td>
-                    </tr>
-                `).join('');
-                
+                // no-cache: always revalidate (ETag/304), never reuse the
+                // max-age copy - a resync must not redraw a stale snapshot
+                const res = await fetch('/api/dashboard', {cache: 'no-cache'});
+                // Revalidated with If-None-Match; same ETag means nothing changed
+                const etag = res.headers.get('ETag');
+                if (etag && etag === lastEtag) return;
+                current = await res.json();
+                lastEtag = etag;
+                render(current);
             } catch (err) {
                 console.error('Failed to load dashboard:', err);
             }
         }
         
-        // Load on start and refresh every 30s
+        // Fold one server-sent event into the last full snapshot and re-render;
+        // syncRows then only touches the cells that actually changed.
+        function applyDelta(delta) {
+            if (delta.type === 'resync' || !current) return loadData();
+            lastEtag = null;  // the snapshot now differs from the server's copy
+            
+            if (delta.type === 'scans') {
+                current.stats.network.total_scans += delta.count;
+            } else if (delta.type === 'sale') {
+                const sale = delta.sale;
+                const stats = current.stats;
+                stats.sales.total += 1;
+                stats.sales.today += 1;
+                stats.sales.this_month += 1;
+                stats.volume.this_month += sale.sale_value;
+                stats.revenue.month_fees += sale.nexus_fee;
+                
+                const client = current.leaderboard.find(c => c.id === sale.client_id);
+                if (!client) return loadData();
+                client.sale_count += 1;
+                client.total_volume += sale.sale_value;
+                client.total_fees += sale.nexus_fee;
+                client.last_seen = sale.sold_at;
+                current.leaderboard.sort((a, b) => b.total_volume - a.total_volume);
+                
+                current.recent_sales.unshift(sale);
+                current.recent_sales.length = Math.min(current.recent_sales.length, 20);
+            }
+            render(current);
+        }
+        
         loadData();
-        setInterval(loadData, 30000);
+        if (window.EventSource) {
+            const es = new EventSource('/api/dashboard/stream');
+            es.onmessage = e => applyDelta(JSON.parse(e.data));
+            es.onopen = () => loadData();  // catch up on anything missed while disconnected
+            // Stream refused (server at its stream limit) - poll instead
+            es.onerror = () => {
+                if (es.readyState === EventSource.CLOSED) setInterval(loadData, 30000);
+            };
+            // Safety net for dropped deltas - reconcile with a full load every 5 min
+            setInterval(loadData, 300000);
+        } else {
+            setInterval(loadData, 30000);
+        }
     </script>
 </body>
 </html>
 '''
 
+# Non-critical dashboard CSS, minified once and served under a fingerprinted name
+STATIC_DIR = Path(__file__).parent / 'static'
+
+def minify_css(css):
+    """Strip comments and collapse whitespace - enough for hand-written CSS"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};:,])\s*', r'\1', css).replace(';}', '}').strip()
+
+_css_bytes = minify_css((STATIC_DIR / 'dashboard.css').read_text('utf-8')).encode('utf-8')
+_css_url = f"/static/dashboard.{hashlib.md5(_css_bytes).hexdigest()[:8]}.css"
+
+_css_gzip = gzip.compress(_css_bytes, 9, mtime=0)
+
+@app.route(_css_url)
+def dashboard_css():
+    """Dashboard stylesheet - the URL changes with the content, so cache it forever"""
+    gzipped = accepts_gzip()
+    response = Response(_css_gzip if gzipped else _css_bytes, mimetype='text/css',
+                        headers={'Cache-Control': 'public, max-age=31536000, immutable'})
+    return mark_gzipped(response) if gzipped else response
+
+# Fill in the stylesheet URL, then encode and hash the page once at import
+_html_bytes = DASHBOARD_HTML.replace('__DASHBOARD_CSS__', _css_url).encode('utf-8')
+_html_etag = hashlib.md5(_html_bytes).hexdigest()
+_html_gzip = gzip.compress(_html_bytes, 9, mtime=0)  # max level - it's only done once
+
 @app.route('/')
 def dashboard():
-    """Main dashboard page"""
-    return render_template_string(DASHBOARD_HTML)
+    """Main dashboard page (304 when the browser's copy is current)"""
+    gzipped = accepts_gzip()
+    response = Response(_html_gzip if gzipped else _html_bytes, mimetype='text/html',
+                        headers={'Cache-Control': 'public, max-age=3600'})
+    response.set_etag(_html_etag)
+    if gzipped:
+        mark_gzipped(response)
+    return response.make_conditional(request)
 
 
 # ============================================
@@ -1136,41 +1948,44 @@ def kickstarter_page():
 # ============================================
 
 if __name__ == '__main__':
-    print()
-    print("=" * 60)
-    print("  NEXUS HQ - THE MOTHERSHIP")
-    print("  Central Command for All NEXUS Deployments")
-    print("=" * 60)
-    print()
-    print(f"  Database: {DB_PATH}")
-    print(f"  Dashboard: http://localhost:5050")
-    print(f"  API: http://localhost:5050/api/")
-    print()
-    print("  Endpoints:")
-    print("    GET  /                         - Web Dashboard")
-    print("    GET  /api/status               - Quick status")
-    print("    GET  /api/dashboard            - Full dashboard data")
-    print()
-    print("  Clients:")
-    print("    GET  /api/clients              - List all clients")
-    print("    POST /api/clients/register     - Register new client")
-    print()
-    print("  Phone Home (clients use these):")
-    print("    POST /api/phone-home/sale      - Report a sale")
-    print("    POST /api/phone-home/scan      - Report a scan")
-    print()
-    print("  Subscriptions:")
-    print("    GET  /api/subscriptions/tiers     - List tiers")
-    print("    GET  /api/subscriptions/revenue   - Revenue stats")
-    print("    GET  /api/subscriptions/invoices  - Pending invoices")
-    print("    POST /api/subscriptions/invoices/create - Create invoice")
-    print("    POST /api/subscriptions/invoices/<id>/pay - Mark paid")
-    print("    PUT  /api/subscriptions/client/<id>/tier - Change tier")
-    print()
-    print("=" * 60)
-    print()
-    
-    import os
+    # One write for the whole banner rather than a syscall per line
+    print('\n'.join([
+        "",
+        "=" * 60,
+        "  NEXUS HQ - THE MOTHERSHIP",
+        "  Central Command for All NEXUS Deployments",
+        "=" * 60,
+        "",
+        f"  Database: {DB_PATH}",
+        f"  Dashboard: http://localhost:5050",
+        f"  API: http://localhost:5050/api/",
+        "",
+        "  Endpoints:",
+        "    GET  /                         - Web Dashboard",
+        "    GET  /api/status               - Quick status",
+        "    GET  /api/dashboard            - Full dashboard data",
+        "",
+        "  Clients:",
+        "    GET  /api/clients              - List all clients",
+        "    POST /api/clients/register     - Register new client",
+        "",
+        "  Phone Home (clients use these):",
+        "    POST /api/phone-home/sale      - Report a sale",
+        "    POST /api/phone-home/scan      - Report a scan",
+        "",
+        "  Subscriptions:",
+        "    GET  /api/subscriptions/tiers     - List tiers",
+        "    GET  /api/subscriptions/revenue   - Revenue stats",
+        "    GET  /api/subscriptions/invoices  - Pending invoices",
+        "    POST /api/subscriptions/invoices/create - Create invoice",
+        "    POST /api/subscriptions/invoices/<id>/pay - Mark paid",
+        "    PUT  /api/subscriptions/client/<id>/tier - Change tier",
+        "",
+        "=" * 60,
+        "",
+    ]))
+    
     port = int(os.environ.get('PORT', 5050))
-    debug = os.environ.get('FLASK_DEBUG', 'true').lower() == 'true'
+    # Dev server only - debug (reloader + interactive debugger) must be asked for
+    debug = os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true')
     app.run(host='0.0.0.0', port=port, debug=debug)
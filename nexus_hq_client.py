@@ -17,16 +17,30 @@ Usage:
         sale_value=45.67
     )
     print(f"NEXUS fee: ${result['nexus_fee']}")
+    
+    # report_scan_async buffers scans and sends them in batches - flush (or
+    # use `with`) on shutdown
+    with NexusHQClient(api_key='nxs_your_key_here') as hq:
+        hq.report_scan_async('Lightning Bolt', set_code='M11', price=1.25)
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import threading
+from collections import deque
+from concurrent.futures import Future
 from typing import Dict, List, Optional
 
 # Default HQ URL - change for production
 DEFAULT_HQ_URL = 'http://localhost:5050'
 # Production: DEFAULT_HQ_URL = 'https://hq.nexuscollectibles.com'
 
+# report_scan_async buffering: send a batch after this long, or once this many are queued
+SCAN_FLUSH_SECONDS = 2
+SCAN_BATCH_MAX = 50
+
 
 class NexusHQClient:
     """Client for communicating with NEXUS HQ"""
@@ -38,13 +52,38 @@ class NexusHQClient:
             'X-API-Key': api_key,
             'Content-Type': 'application/json'
         }
+        
+        # One keep-alive session, so repeat calls skip the TCP/TLS handshake.
+        # Retries only cover connection failures - a POST that reached HQ is
+        # never re-sent.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10,
+                              max_retries=Retry(total=3, backoff_factor=0.3))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self._scan_buffer = deque()
+        self._scan_lock = threading.Lock()
+        self._scan_timer = None
+        self._flush_pending = False  # a full-buffer flush thread is running
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        """Send any buffered scans and release pooled connections"""
+        self.flush()
+        self.session.close()
     
     def _post(self, endpoint: str, data: dict) -> dict:
         """Make POST request to HQ"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f'{self.hq_url}{endpoint}',
-                headers=self.headers,
                 json=data,
                 timeout=10
             )
@@ -55,9 +94,8 @@ class NexusHQClient:
     def _get(self, endpoint: str) -> dict:
         """Make GET request to HQ"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f'{self.hq_url}{endpoint}',
-                headers=self.headers,
                 timeout=10
             )
             return response.json()
@@ -106,6 +144,72 @@ class NexusHQClient:
             'confidence': confidence
         })
     
+    def report_scan_async(self, card_name: str, set_code: str = '',
+                          rarity: str = '', price: float = 0,
+                          confidence: float = 0) -> Future:
+        """
+        Queue a card scan without waiting on HQ
+        
+        Scans are buffered and sent through report_batch_scans every
+        SCAN_FLUSH_SECONDS, or as soon as SCAN_BATCH_MAX are waiting.
+        
+        Returns:
+            Future resolving to the batch response ({'success': True, 'recorded': N})
+        """
+        future = Future()
+        scan = {
+            'card_name': card_name,
+            'set_code': set_code,
+            'rarity': rarity,
+            'price': price,
+            'confidence': confidence
+        }
+        start_flusher = False
+        with self._scan_lock:
+            self._scan_buffer.append((scan, future))
+            if self._flush_pending:
+                pass  # the running flusher drains the buffer until it is empty
+            elif len(self._scan_buffer) >= SCAN_BATCH_MAX:
+                self._flush_pending = start_flusher = True
+            elif self._scan_timer is None:
+                self._scan_timer = threading.Timer(SCAN_FLUSH_SECONDS, self.flush)
+                self._scan_timer.daemon = True
+                self._scan_timer.start()
+        if start_flusher:
+            threading.Thread(target=self._drain_scans, daemon=True,
+                             name='nexus-hq-scans').start()
+        return future
+    
+    def _drain_scans(self):
+        """Flush until the buffer is empty - at most one of these runs at a time"""
+        while True:
+            with self._scan_lock:
+                if not self._scan_buffer:
+                    self._flush_pending = False
+                    return
+            self.flush()
+    
+    def flush(self) -> dict:
+        """Send all buffered scans now and resolve their futures"""
+        with self._scan_lock:
+            if self._scan_timer is not None:
+                self._scan_timer.cancel()
+                self._scan_timer = None
+            pending = list(self._scan_buffer)
+            self._scan_buffer.clear()
+        
+        if not pending:
+            return {'success': True, 'recorded': 0}
+        
+        # Never more than SCAN_BATCH_MAX per request
+        result = None
+        for i in range(0, len(pending), SCAN_BATCH_MAX):
+            chunk = pending[i:i + SCAN_BATCH_MAX]
+            result = self.report_batch_scans([scan for scan, _ in chunk])
+            for _, future in chunk:
+                future.set_result(result)
+        return result
+    
     def report_batch_scans(self, scans: List[dict]) -> dict:
         """
         Report multiple scans at once
@@ -133,8 +237,8 @@ def phone_home_sale(api_key: str, deck_name: str, format: str,
                     card_count: int, sale_value: float, 
                     hq_url: str = DEFAULT_HQ_URL) -> dict:
     """Quick function to report a sale without creating a client instance"""
-    client = NexusHQClient(api_key, hq_url)
-    return client.report_sale(deck_name, format, card_count, sale_value)
+    with NexusHQClient(api_key, hq_url) as client:
+        return client.report_sale(deck_name, format, card_count, sale_value)
 
 
 # Test
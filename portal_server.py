@@ -5,27 +5,74 @@ NEXUS Client Portal Server
 Central server for client authentication, updates, and marketplace.
 Runs on Zultan (192.168.1.152:5000)
 
+Production:
+
+    gunicorn -k gthread -w 4 --threads 8 -b 0.0.0.0:5000 portal_server:app
+
+`python portal_server.py` starts Flask's threaded dev server (FLASK_DEBUG=1
+for the reloader and debugger).
+
 Patent Pending - Kevin Caracozza
 """
 
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import NotFound
 import sqlite3
+import threading
+import queue
+import atexit
 import hashlib
-import uuid
+import hmac
+import secrets
+import ssl
+import time
 import os
-import json
-from datetime import datetime, timedelta
-from functools import wraps
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache, partial, wraps
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+import orjson
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (jsonify, request.json)"""
+
+    @staticmethod
+    def default(o):
+        # Let handlers hand sqlite3.Row objects straight to jsonify
+        if isinstance(o, sqlite3.Row):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        # OPT_NON_STR_KEYS: keys built from column values (e.g. a NULL client
+        # version in the stats) encode like the stdlib's, None -> "null"
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
-CORS(app)
+app.json = ORJSONProvider(app)
+
+# Browser origins allowed to call the portal API (comma-separated)
+CORS_ORIGINS = os.environ.get(
+    'NEXUS_CORS_ORIGINS',
+    'https://hq.nexuscollectibles.com,https://shop.nexuscollectibles.com'
+).split(',')
+CORS(app, origins=CORS_ORIGINS, max_age=86400, supports_credentials=False)
 
 # Configuration
 DB_PATH = "portal.db"
 UPDATES_DIR = "updates"
 CURRENT_VERSION = "3.0.1"
+PASSWORD_ITERATIONS = 600_000  # PBKDF2-HMAC-SHA256 work factor
+HASH_CHUNK_SIZE = 64 * 1024
 SECRET_KEY = os.environ.get("NEXUS_SECRET", "nexus-dev-key-change-in-prod")
+ADMIN_PAGE_SIZE = 100  # default ?limit= for the admin lists
+ADMIN_PAGE_MAX = 500
 
 # =============================================================================
 # DATABASE SETUP
@@ -36,6 +83,9 @@ def init_db():
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
 
+    # WAL lets readers carry on while a writer commits (persists in the file)
+    c.execute('PRAGMA journal_mode=WAL')
+
     # Users table
     c.execute('''CREATE TABLE IF NOT EXISTS users (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -49,6 +99,12 @@ def init_db():
         subscription_expires TIMESTAMP
     )''')
 
+    # Per-user salt for the password KDF (NULL = legacy unsalted SHA-256 hash)
+    try:
+        c.execute('ALTER TABLE users ADD COLUMN salt TEXT')
+    except sqlite3.OperationalError:
+        pass
+
     # Licenses table
     c.execute('''CREATE TABLE IF NOT EXISTS licenses (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -87,6 +143,13 @@ def init_db():
         min_version TEXT
     )''')
 
+    # Digest and size of the update file, recorded at upload time
+    for column in ('sha256 TEXT', 'size INTEGER'):
+        try:
+            c.execute(f'ALTER TABLE versions ADD COLUMN {column}')
+        except sqlite3.OperationalError:
+            pass
+
     # Seller wallets
     c.execute('''CREATE TABLE IF NOT EXISTS wallets (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -125,33 +188,411 @@ def init_db():
         details TEXT
     )''')
 
+    # Per-user activation count for the admin user list, kept current by the
+    # triggers below (backfilled once when the column is added)
+    try:
+        c.execute('ALTER TABLE users ADD COLUMN client_count INTEGER NOT NULL DEFAULT 0')
+        c.execute('''UPDATE users SET client_count = (
+            SELECT COUNT(*) FROM clients c JOIN licenses l ON c.license_id = l.id
+            WHERE l.user_id = users.id
+        )''')
+    except sqlite3.OperationalError:
+        pass
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_clients_count_insert AFTER INSERT ON clients
+        BEGIN
+            UPDATE users SET client_count = client_count + 1
+            WHERE id = (SELECT user_id FROM licenses WHERE id = NEW.license_id);
+        END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_clients_count_delete AFTER DELETE ON clients
+        BEGIN
+            UPDATE users SET client_count = client_count - 1
+            WHERE id = (SELECT user_id FROM licenses WHERE id = OLD.license_id);
+        END''')
+
+    # Indexes for the license-check, login and wallet paths
+    c.execute('CREATE INDEX IF NOT EXISTS idx_clients_license ON clients(license_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_licenses_user_active ON licenses(user_id, is_active)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_wtx_wallet_time ON wallet_transactions(wallet_id, created_at DESC)')
+
+    # Sort keys for the paginated admin lists, as the page queries spell them
+    # (rowid is the implicit tiebreak)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_clients_seen_key ON clients(COALESCE(last_seen, ''))")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_created_key ON users(COALESCE(created_at, ''))")
+
+    # Give the planner statistics the first time round, refresh stale ones after
+    if not c.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        c.execute('ANALYZE')
+    else:
+        c.execute('PRAGMA optimize')
+
     conn.commit()
     conn.close()
 
     # Create updates directory
     os.makedirs(UPDATES_DIR, exist_ok=True)
 
+def log_hash_backend():
+    """Log the OpenSSL build behind hashlib and its SHA-256 throughput"""
+    block = bytes(HASH_CHUNK_SIZE)
+    start = time.perf_counter()
+    h = hashlib.sha256()
+    for _ in range(128):  # 8 MB
+        h.update(block)
+    elapsed = time.perf_counter() - start
+    print(f"Hash backend: {ssl.OPENSSL_VERSION}, SHA-256 {8 / elapsed:.0f} MB/s")
+
+def file_sha256(path):
+    """SHA-256 of a file, read in cache-sized chunks"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+# Set up the schema on import so WSGI servers (gunicorn portal_server:app) get it too
+init_db()
+
+# Run once when a pooled connection is opened (journal_mode=WAL is set in init_db)
+DB_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA busy_timeout=5000',
+)
+
+_tls = threading.local()
+
+# How often each pooled connection runs PRAGMA optimize (seconds). It only
+# re-analyzes tables whose stats have drifted, so a long-running server keeps
+# good plans as clients/wallet_transactions/audit_log grow.
+OPTIMIZE_INTERVAL = 3600
+
 def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """Get this thread's connection (autocommit - multi-statement writers use BEGIN IMMEDIATE)"""
+    conn = getattr(_tls, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(
+            DB_PATH, check_same_thread=False, isolation_level=None, cached_statements=256
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in DB_PRAGMAS:
+            conn.execute(pragma)
+        _tls.conn = conn
+        _tls.optimized_at = time.monotonic()
     return conn
 
-def hash_password(password):
-    """Hash password with salt"""
+@app.teardown_appcontext
+def release_db(exc):
+    """Roll back anything a request left uncommitted - the connection stays pooled"""
+    conn = getattr(_tls, 'conn', None)
+    if conn is None:
+        return
+    if conn.in_transaction:
+        conn.rollback()
+    if time.monotonic() - _tls.optimized_at >= OPTIMIZE_INTERVAL:
+        _tls.optimized_at = time.monotonic()
+        conn.execute('PRAGMA optimize')
+
+# Short-lived in-process caches for read-mostly data
+_cache_lock = threading.Lock()
+_stats_cache = TTLCache(maxsize=1, ttl=30)     # admin stats - up to 30s stale is fine
+_versions_cache = TTLCache(maxsize=2, ttl=60)  # latest version + changelog, cleared by add_version
+
+# =============================================================================
+# SQL STATEMENTS (hot paths)
+# =============================================================================
+# Kept as constants so every call passes the identical string and hits
+# sqlite3's per-connection prepared statement cache.
+
+# Expiry is checked in SQL - datetime() accepts both 'YYYY-MM-DD HH:MM:SS'
+# and ISO 'T' timestamps; an unparseable one counts as expired
+SQL_LICENSE_BY_KEY = '''
+    SELECT *, expires_at IS NOT NULL
+              AND COALESCE(datetime(expires_at) <= datetime('now', 'localtime'), 1) AS expired
+    FROM licenses WHERE license_key = ? AND is_active = 1
+'''
+
+SQL_USER_BY_EMAIL = 'SELECT * FROM users WHERE email = ?'
+
+SQL_ACTIVE_LICENSE_FOR_USER = 'SELECT * FROM licenses WHERE user_id = ? AND is_active = 1'
+
+SQL_UPGRADE_PASSWORD = 'UPDATE users SET password_hash = ?, salt = ? WHERE id = ?'
+
+SQL_COUNT_ACTIVATIONS = 'SELECT COUNT(*) AS count FROM clients WHERE license_id = ?'
+
+SQL_CLIENT_FOR_MACHINE = 'SELECT * FROM clients WHERE license_id = ? AND machine_id = ?'
+
+SQL_TOUCH_CLIENT = '''
+    UPDATE clients SET
+    machine_name = ?, ip_address = ?, version = ?, last_seen = CURRENT_TIMESTAMP
+    WHERE id = ?
+'''
+
+SQL_INSERT_CLIENT = '''
+    INSERT INTO clients (license_id, machine_id, machine_name, ip_address, version, last_seen)
+    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+'''
+
+SQL_WALLET_FOR_USER = 'SELECT * FROM wallets WHERE user_id = ?'
+
+# Create wallet if missing - RETURNING hands back the row (a no-op update
+# covers a concurrent insert), so there is no re-SELECT. RETURNING skips
+# REAL affinity on the 0 defaults, hence the casts.
+SQL_ENSURE_WALLET = '''
+    INSERT INTO wallets (user_id) VALUES (?)
+    ON CONFLICT(user_id) DO UPDATE SET user_id = excluded.user_id
+    RETURNING id, CAST(balance AS REAL) AS balance,
+              CAST(pending_balance AS REAL) AS pending_balance,
+              CAST(total_earned AS REAL) AS total_earned,
+              CAST(total_withdrawn AS REAL) AS total_withdrawn,
+              payout_email, payout_method
+'''
+
+SQL_RECENT_WALLET_TRANSACTIONS = '''
+    SELECT * FROM wallet_transactions
+    WHERE wallet_id = ?
+    ORDER BY created_at DESC LIMIT 20
+'''
+
+# Check-and-deduct in one statement, so two withdrawals can't both spend
+# the same balance
+SQL_DEBIT_WALLET = '''
+    UPDATE wallets SET balance = balance - ?, updated_at = CURRENT_TIMESTAMP
+    WHERE user_id = ? AND balance >= ?
+    RETURNING id, CAST(balance AS REAL) AS balance
+'''
+
+# Add to balance in place - concurrent credits can't overwrite each other
+SQL_CREDIT_WALLET = '''
+    UPDATE wallets SET balance = balance + ?, total_earned = total_earned + ?,
+                       updated_at = CURRENT_TIMESTAMP
+    WHERE user_id = ?
+    RETURNING id, CAST(balance AS REAL) AS balance
+'''
+
+SQL_USER_BY_STATION_KEY = 'SELECT id FROM users WHERE station_api_key = ?'
+
+SQL_LATEST_VERSION = 'SELECT * FROM versions ORDER BY release_date DESC LIMIT 1'
+
+SQL_RECENT_VERSIONS = '''
+    SELECT version, release_date, changelog FROM versions
+    ORDER BY release_date DESC LIMIT 10
+'''
+
+SQL_VERSION = 'SELECT * FROM versions WHERE version = ?'
+
+SQL_INSERT_AUDIT = 'INSERT INTO audit_log (client_id, action, details) VALUES (?, ?, ?)'
+
+# Admin lists, keyset-paginated newest first on (sort column, id) - the
+# *_AFTER variant continues below the previous page's cursor. A NULL sort
+# column pages as '' (after every timestamp), matching the cursor fetch_page builds.
+# The '<= :key' term is what lets SQLite range-search the sort-key index.
+_SQL_CLIENTS_PAGE = '''
+    SELECT c.*, l.license_key, u.email, u.shop_name
+    FROM clients c
+    JOIN licenses l ON c.license_id = l.id
+    JOIN users u ON l.user_id = u.id
+    {}
+    ORDER BY COALESCE(c.last_seen, '') DESC, c.id DESC
+    LIMIT :limit
+'''
+SQL_CLIENTS_PAGE = _SQL_CLIENTS_PAGE.format('')
+SQL_CLIENTS_PAGE_AFTER = _SQL_CLIENTS_PAGE.format(
+    "WHERE COALESCE(c.last_seen, '') <= :key AND (COALESCE(c.last_seen, '') < :key OR c.id < :id)"
+)
+
+_SQL_USERS_PAGE = '''
+    SELECT id, email, shop_name, created_at, is_admin,
+           subscription_tier, subscription_expires, client_count
+    FROM users
+    {}
+    ORDER BY COALESCE(created_at, '') DESC, id DESC
+    LIMIT :limit
+'''
+SQL_USERS_PAGE = _SQL_USERS_PAGE.format('')
+SQL_USERS_PAGE_AFTER = _SQL_USERS_PAGE.format(
+    "WHERE COALESCE(created_at, '') <= :key AND (COALESCE(created_at, '') < :key OR id < :id)"
+)
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def hash_password(password, salt):
+    """Hash password with a per-user salt (PBKDF2-HMAC-SHA256)"""
+    return hashlib.pbkdf2_hmac(
+        'sha256', password.encode(), bytes.fromhex(salt), PASSWORD_ITERATIONS
+    ).hex()
+
+def new_password_hash(password):
+    """Return (password_hash, salt) for storing a new password"""
+    salt = secrets.token_hex(16)
+    return hash_password(password, salt), salt
+
+def legacy_hash_password(password):
+    """Old unsalted scheme - only used to verify and upgrade existing accounts"""
     return hashlib.sha256((password + SECRET_KEY).encode()).hexdigest()
 
+def verify_password(user, password):
+    """Check a password against a users row, upgrading legacy hashes in place"""
+    if user['salt'] is None:
+        if not hmac.compare_digest(user['password_hash'], legacy_hash_password(password)):
+            return False
+        get_db().execute(SQL_UPGRADE_PASSWORD, (*new_password_hash(password), user['id']))
+        return True
+    return hmac.compare_digest(user['password_hash'], hash_password(password, user['salt']))
+
 def generate_license_key():
     """Generate unique license key"""
-    return f"NEXUS-{uuid.uuid4().hex[:8].upper()}-{uuid.uuid4().hex[:8].upper()}"
+    token = secrets.token_hex(8).upper()
+    return f"NEXUS-{token[:8]}-{token[8:]}"
 
 def generate_station_api_key():
     """Generate unique station API key for marketplace integration"""
-    return f"nxs_{uuid.uuid4().hex}"
+    return f"nxs_{secrets.token_hex(16)}"
+
+@lru_cache(maxsize=4096)
+def _machine_id_for(addr):
+    return hashlib.md5(addr.encode()).hexdigest()[:16]
+
+@lru_cache(maxsize=1024)
+def parse_semver(version):
+    """'3.0.10' -> (3, 0, 10) for numeric comparison; junk parts count as 0"""
+    parts = []
+    for part in str(version).strip().lstrip('vV').split('-')[0].split('.')[:3]:
+        digits = re.match(r'\d+', part)
+        parts.append(int(digits.group()) if digits else 0)
+    return tuple(parts + [0] * (3 - len(parts)))
 
 def get_machine_id():
     """Generate machine ID from request"""
-    return hashlib.md5(request.remote_addr.encode()).hexdigest()[:16]
+    return _machine_id_for(request.remote_addr)
+
+def fetch_records(conn, sql, params=()):
+    """Run a query as plain tuples and zip them with the column names.
+
+    Skips the sqlite3.Row wrapper and the JSON provider's per-row default()
+    hook, so orjson encodes the result natively - used by the large admin lists.
+    """
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(sql, params)
+    columns = [d[0] for d in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+def page_args():
+    """(after, limit) from ?after=<cursor>&limit=N; after is a (sort key, id) pair or None.
+
+    Raises ValueError for a malformed cursor.
+    """
+    limit = min(max(request.args.get('limit', ADMIN_PAGE_SIZE, type=int), 1), ADMIN_PAGE_MAX)
+    after = request.args.get('after')
+    if after:
+        key, sep, row_id = after.rpartition('|')
+        if not sep:
+            raise ValueError(after)
+        after = (key, int(row_id))
+    return after, limit
+
+def fetch_page(conn, sql, sql_after, sort_key, after, limit):
+    """One keyset page of records plus the cursor for the next (None on the last page)"""
+    if after:
+        key, row_id = after
+        records = fetch_records(conn, sql_after, {'key': key, 'id': row_id, 'limit': limit + 1})
+    else:
+        records = fetch_records(conn, sql, {'limit': limit + 1})
+    if len(records) <= limit:
+        return records, None
+    last = records[limit - 1]
+    return records[:limit], f"{last[sort_key] or ''}|{last['id']}"
+
+def json_bytes(payload):
+    """JSON response encoded straight to bytes with orjson"""
+    return Response(orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS), mimetype='application/json')
+
+# =============================================================================
+# AUDIT LOG WRITER
+# =============================================================================
+# Audit rows are queued by the request and written by a background thread in
+# batched transactions, so bulk admin actions return without waiting on disk.
+# Rows still queued when the process dies are lost; a clean exit flushes them.
+
+AUDIT_BATCH_MAX = 500
+AUDIT_DRAIN_SECONDS = 0.05
+_audit_queue = queue.Queue()
+_audit_writer = None
+_audit_writer_lock = threading.Lock()
+
+def log_audit(rows):
+    """Queue (client_id, action, details) rows for the background audit writer"""
+    global _audit_writer
+    for row in rows:
+        _audit_queue.put(row)
+    with _audit_writer_lock:
+        # Started lazily so it runs in the process that serves requests,
+        # not in a pre-fork master
+        if _audit_writer is None or not _audit_writer.is_alive():
+            _audit_writer = threading.Thread(target=_audit_writer_loop, name='audit-writer', daemon=True)
+            _audit_writer.start()
+
+def write_audit_rows(batch):
+    """Insert a batch of audit rows in one transaction"""
+    conn = get_db()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.executemany(SQL_INSERT_AUDIT, batch)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+def flush_audit_log():
+    """Write everything still queued and stop the writer (run at exit)"""
+    writer = _audit_writer
+    if writer is not None and writer.is_alive():
+        # The writer finishes every row queued ahead of the None, then exits
+        _audit_queue.put(None)
+        writer.join(timeout=10)
+        return
+    batch = []
+    while True:
+        try:
+            row = _audit_queue.get_nowait()
+        except queue.Empty:
+            break
+        if row is not None:
+            batch.append(row)
+    if batch:
+        write_audit_rows(batch)
+
+def _audit_writer_loop():
+    """Background loop: block for a row, gather more for up to 50ms, write the batch"""
+    stopping = False
+    while not stopping:
+        row = _audit_queue.get()
+        if row is None:
+            return
+        batch = [row]
+        deadline = time.monotonic() + AUDIT_DRAIN_SECONDS
+        while len(batch) < AUDIT_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                row = _audit_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if row is None:
+                stopping = True
+                break
+            batch.append(row)
+        try:
+            write_audit_rows(batch)
+        except sqlite3.Error as e:
+            print(f"[!] audit log write failed ({len(batch)} rows): {e}")
+
+atexit.register(flush_audit_log)
 
 # =============================================================================
 # AUTH DECORATORS
@@ -165,17 +606,12 @@ def require_license(f):
         if not license_key:
             return jsonify({'error': 'License key required'}), 401
 
-        conn = get_db()
-        license = conn.execute(
-            'SELECT * FROM licenses WHERE license_key = ? AND is_active = 1',
-            (license_key,)
-        ).fetchone()
-        conn.close()
+        license = get_db().execute(SQL_LICENSE_BY_KEY, (license_key,)).fetchone()
 
         if not license:
             return jsonify({'error': 'Invalid license'}), 401
 
-        if license['expires_at'] and datetime.fromisoformat(license['expires_at']) < datetime.now():
+        if license['expired']:
             return jsonify({'error': 'License expired'}), 401
 
         request.license = dict(license)
@@ -207,19 +643,23 @@ def register():
     if not email or not password:
         return jsonify({'error': 'Email and password required'}), 400
 
+    # Derive keys and the (slow) password hash before taking the write lock
+    station_api_key = generate_station_api_key()
+    password_hash, salt = new_password_hash(password)
+    license_key = generate_license_key()
+
     conn = get_db()
     try:
         # Create user with station API key
         c = conn.cursor()
-        station_api_key = generate_station_api_key()
+        c.execute('BEGIN IMMEDIATE')
         c.execute(
-            'INSERT INTO users (email, password_hash, shop_name, station_api_key) VALUES (?, ?, ?, ?)',
-            (email, hash_password(password), shop_name, station_api_key)
+            'INSERT INTO users (email, password_hash, salt, shop_name, station_api_key) VALUES (?, ?, ?, ?, ?)',
+            (email, password_hash, salt, shop_name, station_api_key)
         )
         user_id = c.lastrowid
 
         # Generate license
-        license_key = generate_license_key()
         c.execute(
             'INSERT INTO licenses (license_key, user_id) VALUES (?, ?)',
             (license_key, user_id)
@@ -241,9 +681,8 @@ def register():
             'message': 'Registration successful'
         })
     except sqlite3.IntegrityError:
+        conn.rollback()
         return jsonify({'error': 'Email already registered'}), 409
-    finally:
-        conn.close()
 
 @app.route('/api/auth/login', methods=['POST'])
 def login():
@@ -252,22 +691,18 @@ def login():
     email = data.get('email')
     password = data.get('password')
 
+    if not email or not password:
+        return jsonify({'error': 'Invalid credentials'}), 401
+
+    # Look the user up by the UNIQUE email index, then verify in Python
     conn = get_db()
-    user = conn.execute(
-        'SELECT * FROM users WHERE email = ? AND password_hash = ?',
-        (email, hash_password(password))
-    ).fetchone()
+    user = conn.execute(SQL_USER_BY_EMAIL, (email,)).fetchone()
 
-    if not user:
-        conn.close()
+    if not user or not verify_password(user, password):
         return jsonify({'error': 'Invalid credentials'}), 401
 
     # Get license
-    license = conn.execute(
-        'SELECT * FROM licenses WHERE user_id = ? AND is_active = 1',
-        (user['id'],)
-    ).fetchone()
-    conn.close()
+    license = conn.execute(SQL_ACTIVE_LICENSE_FOR_USER, (user['id'],)).fetchone()
 
     return jsonify({
         'success': True,
@@ -285,28 +720,30 @@ def login():
 def validate_license():
     """Validate license and register client"""
     data = request.json or {}
-    machine_id = data.get('machine_id', get_machine_id())
+    machine_id = data.get('machine_id') or get_machine_id()
     machine_name = data.get('machine_name', 'Unknown')
     version = data.get('version', 'Unknown')
 
     conn = get_db()
 
+    # Count and register under one write lock so concurrent activations
+    # can't both slip under the limit
+    conn.execute('BEGIN IMMEDIATE')
+
     # Check activation count
     activations = conn.execute(
-        'SELECT COUNT(*) as count FROM clients WHERE license_id = ?',
-        (request.license['id'],)
+        SQL_COUNT_ACTIVATIONS, (request.license['id'],)
     ).fetchone()['count']
 
     max_activations = request.license['max_activations']
 
     # Check if this machine already registered
     existing = conn.execute(
-        'SELECT * FROM clients WHERE license_id = ? AND machine_id = ?',
-        (request.license['id'], machine_id)
+        SQL_CLIENT_FOR_MACHINE, (request.license['id'], machine_id)
     ).fetchone()
 
     if not existing and activations >= max_activations:
-        conn.close()
+        conn.rollback()
         return jsonify({
             'valid': False,
             'error': f'Maximum activations ({max_activations}) reached'
@@ -315,23 +752,19 @@ def validate_license():
     # Register/update client
     if existing:
         conn.execute(
-            '''UPDATE clients SET
-               machine_name = ?, ip_address = ?, version = ?, last_seen = CURRENT_TIMESTAMP
-               WHERE id = ?''',
+            SQL_TOUCH_CLIENT,
             (machine_name, request.remote_addr, version, existing['id'])
         )
         client_id = existing['id']
     else:
         c = conn.cursor()
         c.execute(
-            '''INSERT INTO clients (license_id, machine_id, machine_name, ip_address, version, last_seen)
-               VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)''',
+            SQL_INSERT_CLIENT,
             (request.license['id'], machine_id, machine_name, request.remote_addr, version)
         )
         client_id = c.lastrowid
 
     conn.commit()
-    conn.close()
 
     return jsonify({
         'valid': True,
@@ -346,10 +779,9 @@ def get_station_key():
     """Get station API key for marketplace integration"""
     conn = get_db()
     user = conn.execute(
-        'SELECT station_api_key, shop_name FROM users WHERE id = (SELECT user_id FROM licenses WHERE id = ?)',
-        (request.license['id'],)
+        'SELECT station_api_key, shop_name FROM users WHERE id = ?',
+        (request.license['user_id'],)
     ).fetchone()
-    conn.close()
 
     if not user:
         return jsonify({'error': 'User not found'}), 404
@@ -366,11 +798,9 @@ def regenerate_station_key():
     conn = get_db()
     new_key = generate_station_api_key()
     conn.execute(
-        'UPDATE users SET station_api_key = ? WHERE id = (SELECT user_id FROM licenses WHERE id = ?)',
-        (new_key, request.license['id'])
+        'UPDATE users SET station_api_key = ? WHERE id = ?',
+        (new_key, request.license['user_id'])
     )
-    conn.commit()
-    conn.close()
 
     return jsonify({
         'success': True,
@@ -386,36 +816,17 @@ def regenerate_station_key():
 def get_wallet():
     """Get seller wallet info"""
     conn = get_db()
-    user_id = conn.execute(
-        'SELECT user_id FROM licenses WHERE id = ?',
-        (request.license['id'],)
-    ).fetchone()['user_id']
-
-    wallet = conn.execute(
-        'SELECT * FROM wallets WHERE user_id = ?',
-        (user_id,)
-    ).fetchone()
+    user_id = request.license['user_id']  # already loaded by require_license
+
+    wallet = conn.execute(SQL_WALLET_FOR_USER, (user_id,)).fetchone()
 
     if not wallet:
-        # Create wallet if missing
-        conn.execute(
-            'INSERT INTO wallets (user_id) VALUES (?)',
-            (user_id,)
-        )
-        conn.commit()
-        wallet = conn.execute(
-            'SELECT * FROM wallets WHERE user_id = ?',
-            (user_id,)
-        ).fetchone()
+        wallet = conn.execute(SQL_ENSURE_WALLET, (user_id,)).fetchone()
 
     # Get recent transactions
     transactions = conn.execute(
-        '''SELECT * FROM wallet_transactions
-           WHERE wallet_id = ?
-           ORDER BY created_at DESC LIMIT 20''',
-        (wallet['id'],)
+        SQL_RECENT_WALLET_TRANSACTIONS, (wallet['id'],)
     ).fetchall()
-    conn.close()
 
     return jsonify({
         'balance': wallet['balance'],
@@ -424,7 +835,7 @@ def get_wallet():
         'total_withdrawn': wallet['total_withdrawn'],
         'payout_email': wallet['payout_email'],
         'payout_method': wallet['payout_method'],
-        'transactions': [dict(t) for t in transactions]
+        'transactions': transactions
     })
 
 @app.route('/api/wallet/payout', methods=['POST'])
@@ -436,18 +847,13 @@ def update_payout_settings():
     payout_method = data.get('payout_method', 'paypal')
 
     conn = get_db()
-    user_id = conn.execute(
-        'SELECT user_id FROM licenses WHERE id = ?',
-        (request.license['id'],)
-    ).fetchone()['user_id']
+    user_id = request.license['user_id']  # already loaded by require_license
 
     conn.execute(
         '''UPDATE wallets SET payout_email = ?, payout_method = ?, updated_at = CURRENT_TIMESTAMP
            WHERE user_id = ?''',
         (payout_email, payout_method, user_id)
     )
-    conn.commit()
-    conn.close()
 
     return jsonify({'success': True})
 
@@ -462,27 +868,14 @@ def request_withdrawal():
         return jsonify({'error': 'Invalid amount'}), 400
 
     conn = get_db()
-    user_id = conn.execute(
-        'SELECT user_id FROM licenses WHERE id = ?',
-        (request.license['id'],)
-    ).fetchone()['user_id']
-
-    wallet = conn.execute(
-        'SELECT * FROM wallets WHERE user_id = ?',
-        (user_id,)
-    ).fetchone()
+    user_id = request.license['user_id']  # already loaded by require_license
 
-    if not wallet or wallet['balance'] < amount:
-        conn.close()
-        return jsonify({'error': 'Insufficient balance'}), 400
+    conn.execute('BEGIN IMMEDIATE')
+    wallet = conn.execute(SQL_DEBIT_WALLET, (amount, user_id, amount)).fetchone()
 
-    # Deduct from balance, add to pending withdrawal
-    new_balance = wallet['balance'] - amount
-    conn.execute(
-        '''UPDATE wallets SET balance = ?, updated_at = CURRENT_TIMESTAMP
-           WHERE user_id = ?''',
-        (new_balance, user_id)
-    )
+    if not wallet:
+        conn.rollback()
+        return jsonify({'error': 'Insufficient balance'}), 400
 
     # Record transaction
     conn.execute(
@@ -491,11 +884,10 @@ def request_withdrawal():
         (wallet['id'], -amount)
     )
     conn.commit()
-    conn.close()
 
     return jsonify({
         'success': True,
-        'new_balance': new_balance,
+        'new_balance': wallet['balance'],
         'withdrawal_amount': amount
     })
 
@@ -513,33 +905,19 @@ def credit_wallet():
         return jsonify({'error': 'Invalid request'}), 400
 
     conn = get_db()
-    user = conn.execute(
-        'SELECT id FROM users WHERE station_api_key = ?',
-        (station_api_key,)
-    ).fetchone()
+    conn.execute('BEGIN IMMEDIATE')
+    user = conn.execute(SQL_USER_BY_STATION_KEY, (station_api_key,)).fetchone()
 
     if not user:
-        conn.close()
+        conn.rollback()
         return jsonify({'error': 'Seller not found'}), 404
 
-    wallet = conn.execute(
-        'SELECT * FROM wallets WHERE user_id = ?',
-        (user['id'],)
-    ).fetchone()
+    wallet = conn.execute(SQL_CREDIT_WALLET, (amount, amount, user['id'])).fetchone()
 
     if not wallet:
-        conn.close()
+        conn.rollback()
         return jsonify({'error': 'Wallet not found'}), 404
 
-    # Add to balance
-    new_balance = wallet['balance'] + amount
-    new_total = wallet['total_earned'] + amount
-    conn.execute(
-        '''UPDATE wallets SET balance = ?, total_earned = ?, updated_at = CURRENT_TIMESTAMP
-           WHERE id = ?''',
-        (new_balance, new_total, wallet['id'])
-    )
-
     # Record transaction
     conn.execute(
         '''INSERT INTO wallet_transactions (wallet_id, type, amount, description, order_id)
@@ -547,28 +925,38 @@ def credit_wallet():
         (wallet['id'], amount, description, order_id)
     )
     conn.commit()
-    conn.close()
 
     return jsonify({
         'success': True,
-        'new_balance': new_balance
+        'new_balance': wallet['balance']
     })
 
 # =============================================================================
 # UPDATE ENDPOINTS
 # =============================================================================
 
+@cached(_versions_cache, key=partial(hashkey, 'latest_version'), lock=_cache_lock)
+def get_latest_version():
+    """Newest release row (every client polls for this), with its parsed version"""
+    latest = get_db().execute(SQL_LATEST_VERSION).fetchone()
+    if not latest:
+        return None
+    latest = dict(latest)
+    latest['parsed'] = parse_semver(latest['version'])
+    return latest
+
+@cached(_versions_cache, key=partial(hashkey, 'changelog'), lock=_cache_lock)
+def get_recent_versions():
+    """Last 10 releases for the changelog"""
+    versions = get_db().execute(SQL_RECENT_VERSIONS).fetchall()
+    return [dict(v) for v in versions]
+
 @app.route('/api/updates/check', methods=['GET'])
 @require_license
 def check_updates():
     """Check for available updates"""
     current = request.args.get('version', '0.0.0')
-
-    conn = get_db()
-    latest = conn.execute(
-        'SELECT * FROM versions ORDER BY release_date DESC LIMIT 1'
-    ).fetchone()
-    conn.close()
+    latest = get_latest_version()
 
     if not latest:
         return jsonify({
@@ -577,7 +965,7 @@ def check_updates():
             'latest_version': CURRENT_VERSION
         })
 
-    update_available = latest['version'] > current
+    update_available = latest['parsed'] > parse_semver(current)
 
     return jsonify({
         'update_available': update_available,
@@ -592,32 +980,32 @@ def check_updates():
 @require_license
 def download_update(version):
     """Download specific version"""
-    conn = get_db()
-    ver = conn.execute(
-        'SELECT * FROM versions WHERE version = ?', (version,)
-    ).fetchone()
-    conn.close()
+    ver = get_db().execute(SQL_VERSION, (version,)).fetchone()
 
     if not ver or not ver['file_path']:
         return jsonify({'error': 'Version not found'}), 404
 
-    file_path = os.path.join(UPDATES_DIR, ver['file_path'])
-    if not os.path.exists(file_path):
+    # Versioned files never change, so let clients revalidate against the
+    # digest stored at upload time instead of re-downloading
+    release_date = datetime.fromisoformat(ver['release_date'])
+    try:
+        response = send_from_directory(
+            UPDATES_DIR, ver['file_path'], as_attachment=True, conditional=True,
+            etag=ver['sha256'] or True,
+            last_modified=release_date.replace(tzinfo=timezone.utc)
+        )
+    except NotFound:
         return jsonify({'error': 'Update file not found'}), 404
 
-    return send_file(file_path, as_attachment=True)
+    # private: the file is licensed, so shared caches and CDNs must not keep it
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
 
 @app.route('/api/updates/changelog', methods=['GET'])
 def get_changelog():
     """Get changelog for all versions"""
-    conn = get_db()
-    versions = conn.execute(
-        'SELECT version, release_date, changelog FROM versions ORDER BY release_date DESC LIMIT 10'
-    ).fetchall()
-    conn.close()
-
     return jsonify({
-        'versions': [dict(v) for v in versions]
+        'versions': get_recent_versions()
     })
 
 # =============================================================================
@@ -627,38 +1015,38 @@ def get_changelog():
 @app.route('/api/admin/clients', methods=['GET'])
 @require_admin
 def list_clients():
-    """List all registered clients"""
-    conn = get_db()
-    clients = conn.execute('''
-        SELECT c.*, l.license_key, u.email, u.shop_name
-        FROM clients c
-        JOIN licenses l ON c.license_id = l.id
-        JOIN users u ON l.user_id = u.id
-        ORDER BY c.last_seen DESC
-    ''').fetchall()
-    conn.close()
+    """List registered clients, most recently seen first (?after=<next_cursor>&limit=N)"""
+    try:
+        after, limit = page_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
 
-    return jsonify({
-        'clients': [dict(c) for c in clients]
+    clients, next_cursor = fetch_page(
+        get_db(), SQL_CLIENTS_PAGE, SQL_CLIENTS_PAGE_AFTER, 'last_seen', after, limit
+    )
+
+    return json_bytes({
+        'clients': clients,
+        'next_cursor': next_cursor
     })
 
 @app.route('/api/admin/users', methods=['GET'])
 @require_admin
 def list_users():
-    """List all users"""
-    conn = get_db()
-    users = conn.execute('''
-        SELECT u.*, COUNT(c.id) as client_count
-        FROM users u
-        LEFT JOIN licenses l ON u.id = l.user_id
-        LEFT JOIN clients c ON l.id = c.license_id
-        GROUP BY u.id
-        ORDER BY u.created_at DESC
-    ''').fetchall()
-    conn.close()
+    """List users, newest first (?after=<next_cursor>&limit=N)"""
+    try:
+        after, limit = page_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
 
-    return jsonify({
-        'users': [dict(u) for u in users]
+    # client_count is maintained by triggers on clients (see init_db)
+    users, next_cursor = fetch_page(
+        get_db(), SQL_USERS_PAGE, SQL_USERS_PAGE_AFTER, 'created_at', after, limit
+    )
+
+    return json_bytes({
+        'users': users,
+        'next_cursor': next_cursor
     })
 
 @app.route('/api/admin/versions', methods=['POST'])
@@ -674,19 +1062,27 @@ def add_version():
     if not version:
         return jsonify({'error': 'Version required'}), 400
 
+    sha256 = size = None
+    if file_path and os.path.isfile(os.path.join(UPDATES_DIR, file_path)):
+        sha256 = file_sha256(os.path.join(UPDATES_DIR, file_path))
+        size = os.path.getsize(os.path.join(UPDATES_DIR, file_path))
+
     conn = get_db()
     try:
         conn.execute(
-            '''INSERT INTO versions (version, changelog, is_mandatory, file_path)
-               VALUES (?, ?, ?, ?)''',
-            (version, changelog, int(is_mandatory), file_path)
+            '''INSERT INTO versions (version, changelog, is_mandatory, file_path, sha256, size)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (version, changelog, int(is_mandatory), file_path, sha256, size)
         )
-        conn.commit()
-        return jsonify({'success': True, 'version': version})
+        with _cache_lock:
+            _versions_cache.clear()
+        result = {'success': True, 'version': version}
+        if sha256:
+            result['sha256'] = sha256
+            result['size'] = size
+        return jsonify(result)
     except sqlite3.IntegrityError:
         return jsonify({'error': 'Version already exists'}), 409
-    finally:
-        conn.close()
 
 @app.route('/api/admin/push_update', methods=['POST'])
 @require_admin
@@ -699,14 +1095,8 @@ def push_update():
     # In a real system, this would send push notifications
     # For now, clients poll for updates
 
-    conn = get_db()
-    for client_id in client_ids:
-        conn.execute(
-            'INSERT INTO audit_log (client_id, action, details) VALUES (?, ?, ?)',
-            (client_id, 'push_update', json.dumps({'version': version}))
-        )
-    conn.commit()
-    conn.close()
+    details = orjson.dumps({'version': version}).decode()
+    log_audit((client_id, 'push_update', details) for client_id in client_ids)
 
     return jsonify({
         'success': True,
@@ -717,16 +1107,20 @@ def push_update():
 @require_admin
 def get_stats():
     """Get portal statistics"""
+    return jsonify(compute_stats())
+
+@cached(_stats_cache, key=partial(hashkey, 'stats'), lock=_cache_lock)
+def compute_stats():
+    """Portal counts in one pass (clients scanned once) plus version distribution"""
     conn = get_db()
 
-    stats = {
-        'total_users': conn.execute('SELECT COUNT(*) FROM users').fetchone()[0],
-        'total_clients': conn.execute('SELECT COUNT(*) FROM clients').fetchone()[0],
-        'active_today': conn.execute(
-            "SELECT COUNT(*) FROM clients WHERE last_seen > datetime('now', '-1 day')"
-        ).fetchone()[0],
-        'total_licenses': conn.execute('SELECT COUNT(*) FROM licenses WHERE is_active = 1').fetchone()[0],
-    }
+    stats = dict(conn.execute('''
+        SELECT (SELECT COUNT(*) FROM users) AS total_users,
+               COUNT(*) AS total_clients,
+               COALESCE(SUM(last_seen > datetime('now', '-1 day')), 0) AS active_today,
+               (SELECT COUNT(*) FROM licenses WHERE is_active = 1) AS total_licenses
+        FROM clients
+    ''').fetchone())
 
     # Version distribution
     versions = conn.execute('''
@@ -737,8 +1131,7 @@ def get_stats():
     ''').fetchall()
     stats['version_distribution'] = {v['version']: v['count'] for v in versions}
 
-    conn.close()
-    return jsonify(stats)
+    return stats
 
 # =============================================================================
 # STATIC PAGES
@@ -753,15 +1146,20 @@ def kickstarter_page():
 # HEALTH CHECK
 # =============================================================================
 
-@app.route('/api/health', methods=['GET'])
-def health():
-    """Health check endpoint"""
-    return jsonify({
+@lru_cache(maxsize=1)
+def _health_body(second):
+    """Encoded health payload - rebuilt at most once a second under polling"""
+    return orjson.dumps({
         'status': 'ok',
         'version': CURRENT_VERSION,
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.fromtimestamp(second).isoformat()
     })
 
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Health check endpoint"""
+    return Response(_health_body(int(time.time())), mimetype='application/json')
+
 # =============================================================================
 # MAIN
 # =============================================================================
@@ -771,11 +1169,13 @@ if __name__ == '__main__':
     print("NEXUS Client Portal Server")
     print("=" * 50)
 
-    init_db()
     print(f"Database initialized: {DB_PATH}")
     print(f"Updates directory: {UPDATES_DIR}")
+    log_hash_backend()
     print(f"Current version: {CURRENT_VERSION}")
     print()
     print("Starting server on 0.0.0.0:5000")
 
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Dev server only - debug (reloader + interactive debugger) must be asked for
+    debug = os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true')
+    app.run(host='0.0.0.0', port=5000, debug=debug, threaded=True)
@@ -7,7 +7,7 @@ Creates sample clients, sales, and invoices for testing
 import sys
 sys.path.insert(0, '.')
 
-from hq_server import (register_client, record_sale, record_scan, 
+from hq_server import (register_clients_bulk, record_sales_bulk, record_scan,
                        get_dashboard_stats, create_invoice, mark_invoice_paid,
                        get_subscription_revenue)
 
@@ -48,8 +48,7 @@ clients = [
 ]
 
 registered = []
-for c in clients:
-    result = register_client(**c)
+for c, result in zip(clients, register_clients_bulk(clients)):
     if result.get('success'):
         print(f"[OK] Registered: {c['name']} ({c['tier']}) - API Key: {result['api_key'][:20]}...")
         registered.append(result)
@@ -67,16 +66,18 @@ if registered:
     ]
     
     print("\n[+] Adding sample sales...")
-    for i, (deck, fmt, cards, value) in enumerate(sales_data):
-        client = registered[i % len(registered)]
-        result = record_sale(
-            client_id=client['client_id'],
-            deck_name=deck,
-            format=fmt,
-            card_count=cards,
-            sale_value=value
-        )
-        print(f"   {deck}: ${value:.2f} -> Fee: ${result['nexus_fee']:.2f}")
+    sales = [
+        {
+            'client_id': registered[i % len(registered)]['client_id'],
+            'deck_name': deck,
+            'format': fmt,
+            'card_count': cards,
+            'sale_value': value
+        }
+        for i, (deck, fmt, cards, value) in enumerate(sales_data)
+    ]
+    for sale, result in zip(sales, record_sales_bulk(sales)):
+        print(f"   {sale['deck_name']}: ${sale['sale_value']:.2f} -> Fee: ${result['nexus_fee']:.2f}")
     
     # Create and pay some invoices
     print("\n[$] Creating subscription invoices...")
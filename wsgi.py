@@ -0,0 +1,12 @@
+"""
+WSGI entry point for NEXUS HQ
+
+    gunicorn -c gunicorn.conf.py          # uses wsgi:app
+
+Importing hq_server sets up the database (init_db) and the app; no dev
+server is started from here.
+"""
+
+from hq_server import app
+
+__all__ = ['app']